@@ -1,11 +1,22 @@
 import csv
+import io
+import struct
 
 import pytest
 
+import main as main_module
 from main import (get_column_types, get_path_to_csv_file, get_where_params,
                   get_aggregate_params, get_order_by_params,
                   read_lines_of_file, get_list_where, aggregate_list_objs,
-                  get_list_order_by, main)
+                  get_list_order_by, main, get_accumulator,
+                  select_kth_value, StringDictionary, write_columnar_file,
+                  ColumnarFile, iter_batches_of_file, aggregate_batches,
+                  main_of_batches, get_csv_format, iter_rows_of_file,
+                  open_table, get_join_params, is_left_build_side,
+                  hash_join_batches, get_joined_batches, get_queries_params,
+                  run_queries, write_queries_results, PrefetchTextFile,
+                  RowIndex, PagerSource, render_page, convert_rows,
+                  get_size_of_batch, iter_batches_of_table, run_pager)
 
 
 def create_dir_or_file(
@@ -32,6 +43,7 @@ def create_dir_or_file(
 @pytest.mark.parametrize('path, directory_name, file_name, final_path', [
     (None, None, 'file.csv', 'file.csv'),
     ('file.csv', None, 'file.csv', 'file.csv'),
+    ('file.cols', None, 'file.cols', 'file.cols'),
 ])
 def test_get_path_to_csv_file(
     tmp_path,
@@ -117,6 +129,176 @@ def test_get_column_types(tmp_path, data_to_csv, expected_result):
     assert get_column_types(path) == expected_result
 
 
+@pytest.mark.parametrize('text, delimiter, expected_result', [
+    ('name,year\nalex,1985\n', None, ','),
+    ('name;year\nalex;1985\n', None, ';'),
+    ('name\tyear\nalex\t1985\n', None, '\t'),
+    ('name|year\nalex|1985\n', None, '|'),
+    ('name\nalex\n', None, ','),
+    ('name;year\nalex;1985\n', ',', ','),
+    ('name\tyear\nalex\t1985\n', '\\t', '\t'),
+])
+def test_get_csv_format(tmp_path, text, delimiter, expected_result):
+    path = tmp_path / 'file.csv'
+    path.write_text(text)
+
+    assert get_csv_format(path, delimiter) == {
+        'delimiter': expected_result,
+        'quotechar': '"',
+        'encoding': 'utf-8'
+    }
+
+
+@pytest.mark.parametrize('kwargs, expected_result', [
+    (
+        {'delimiter': ';;'},
+        'Error: invalid value in the "--delimiter" argument'
+    ),
+    (
+        {'quotechar': ''},
+        'Error: invalid value in the "--quotechar" argument'
+    ),
+    (
+        {'encoding': 'no-such-encoding'},
+        'Error: invalid value in the "--encoding" argument'
+    ),
+    (
+        {'encoding': 'ascii'},
+        'Error: the file does not match the "--encoding" argument'
+    ),
+])
+def test_exception_get_csv_format(tmp_path, kwargs, expected_result):
+    path = tmp_path / 'file.csv'
+    path.write_text('name,city\nalex,Zürich\n', encoding='utf-8')
+
+    with pytest.raises(SystemExit) as e:
+        get_csv_format(path, **kwargs)
+
+    assert e.value.code == expected_result
+
+
+@pytest.mark.parametrize('text', [
+    'name,year\nalex,1985\n\nmark,1990',
+    'name,year\n"alex, jr",1985\nmark,1990\n',
+    'name,year\nalex,1985\nmark,1990\n"cole\nsmith",2000\n',
+    'a,b\n"x""y",\n,\n',
+    'name\nalex\n\nmark\n',
+    'name,year\n\nalex,1985\nmark,1990\n\n',
+    'name,size\nTV 55",100\nradio,5\ncd,1\n',
+    'a,b\nx\x1cy,1\nz\x85\u2028w,2\n"p\nq",3\n',
+    'a,b\n"x""\ny",1\nz,2',
+])
+@pytest.mark.parametrize('block_size', [3, 16, 1 << 20])
+def test_iter_rows_of_file(monkeypatch, text, block_size):
+    monkeypatch.setattr(main_module, 'READ_BLOCK_SIZE', block_size)
+
+    assert list(map(list, iter_rows_of_file(io.StringIO(text)))) == list(
+        csv.reader(io.StringIO(text))
+    )
+
+
+def test_mid_field_quote_of_iter_rows_of_file(monkeypatch):
+    monkeypatch.setattr(main_module, 'READ_BLOCK_SIZE', 32)
+    text = 'name,size\nTV 55",100\n' + 'radio,5\n' * 1000
+    file = io.StringIO(text)
+    reads = []
+    read = file.read
+    monkeypatch.setattr(
+        file,
+        'read',
+        lambda size: reads.append(file.tell()) or read(size)
+    )
+
+    rows = list(iter_rows_of_file(file))
+
+    assert list(map(list, rows[:3])) == [
+        ['name', 'size'], ['TV 55"', '100'], ['radio', '5']
+    ]
+    assert len(rows) == 1002
+    assert isinstance(rows[-1], tuple)
+    assert len(reads) > 200
+
+
+def test_fallback_of_iter_rows_of_file(monkeypatch):
+    monkeypatch.setattr(main_module, 'READ_BLOCK_SIZE', 16)
+    text = 'name,year\n"alex, jr",1985\nmark,1990\ncole,2000\n'
+
+    rows = list(iter_rows_of_file(io.StringIO(text)))
+
+    assert rows == [
+        ['name', 'year'],
+        ['alex, jr', '1985'],
+        ('mark', '1990'),
+        ('cole', '2000'),
+    ]
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'name,year\nalex,1985\nmark,1990',
+    b'name,year\r\nalex,1985\r\nmark,1990\r\n',
+    b'name,city\r\nalex,Z\xc3\xbcrich\rmark,\xd0\x9c\xd0\xbe\xd1\x81\n',
+])
+@pytest.mark.parametrize('depth, block_size', [(1, 1), (2, 3), (4, 1 << 20)])
+def test_prefetch_text_file(tmp_path, data, depth, block_size):
+    path = tmp_path / 'file.csv'
+    path.write_bytes(data)
+
+    with open(path, encoding='utf-8') as file:
+        expected_result = file.read()
+
+    with PrefetchTextFile(path, 'utf-8', depth, block_size) as file:
+        assert file.readline() + ''.join(iter(file.read, '')) == (
+            expected_result
+        )
+
+    with PrefetchTextFile(path, 'utf-8', depth, block_size) as file:
+        assert list(file) == expected_result.splitlines(keepends=True)
+
+
+def test_close_prefetch_text_file(tmp_path):
+    path = tmp_path / 'file.csv'
+    path.write_text('name,year\n' + 'alex,1985\n' * 1000)
+
+    with PrefetchTextFile(path, 'utf-8', depth=2, block_size=16) as file:
+        assert file.readline() == 'name,year\n'
+
+    assert not file.reader.thread.is_alive()
+
+
+@pytest.mark.parametrize('prefetch_depth', [0, 1, 3])
+def test_prefetch_of_iter_batches_of_file(tmp_path, prefetch_depth):
+    path = tmp_path / 'file.csv'
+    path.write_text(
+        'name,year\n' + ''.join(f'"a{i}",{i}\n' for i in range(300))
+    )
+    column_types = {'name': str, 'year': int}
+
+    batches = iter_batches_of_file(
+        path, column_types, batch_size=7, prefetch_depth=prefetch_depth
+    )
+
+    assert sum(batches, []) == [
+        {'name': f'a{i}', 'year': i} for i in range(300)
+    ]
+
+
+def test_csv_format_of_read_lines_of_file(tmp_path):
+    path = tmp_path / 'file.csv'
+    path.write_text("name;price\n'galaxy; ultra';10.5\nredmi;7\n")
+    csv_format = {'delimiter': ';', 'quotechar': "'", 'encoding': 'utf-8'}
+
+    column_types = get_column_types(path, csv_format)
+
+    assert column_types == {'name': str, 'price': float}
+    assert read_lines_of_file(
+        path, column_types, csv_format=csv_format
+    ) == [
+        {'name': 'galaxy; ultra', 'price': 10.5},
+        {'name': 'redmi', 'price': 7.0},
+    ]
+
+
 @pytest.mark.parametrize('params, expected_result', [
     ('name=alex', {'column': 'name', 'operator': '=', 'value': 'alex'}),
     ('year<10',   {'column': 'year', 'operator': '<', 'value': 10}),
@@ -166,6 +348,15 @@ def test_exception_get_where_params(params, expected_result):
 @pytest.mark.parametrize('params, expected_result', [
     ('year=avg',  {'column': 'year', 'operator': '=', 'value': 'avg'}),
     ('age=avg',   {'column': 'age', 'operator': '=', 'value': 'avg'}),
+    ('age=p90',   {'column': 'age', 'operator': '=', 'value': 'p90'}),
+    (
+        'year=min,max,stddev',
+        {'column': 'year', 'operator': '=', 'value': 'min,max,stddev'}
+    ),
+    (
+        'name=count_distinct',
+        {'column': 'name', 'operator': '=', 'value': 'count_distinct'}
+    ),
     (None, None),
 ])
 def test_get_aggregate_params(params, expected_result):
@@ -182,7 +373,11 @@ def test_get_aggregate_params(params, expected_result):
 
     ('height=avg', 'Error: invalid column in the "--aggregate" argument'),
     ('name=avg',   'Error: invalid column type in the "--aggregate" argument'),
+    ('name=count,sum',
+     'Error: invalid column type in the "--aggregate" argument'),
     ('year=fff',   'Error: invalid value in the "--aggregate" argument'),
+    ('year=p101',  'Error: invalid value in the "--aggregate" argument'),
+    ('year=avg,f', 'Error: invalid value in the "--aggregate" argument'),
 ])
 def test_exception_get_aggregate_params(params, expected_result):
     column_types = {'name': str, 'year': int, 'age': float}
@@ -250,6 +445,185 @@ def test_read_lines_of_file(
     assert read_lines_of_file(path, column_types) == expected_result
 
 
+@pytest.mark.parametrize('batch_size, expected_result', [
+    (1, [1, 1, 1]),
+    (2, [2, 1]),
+    (5, [3]),
+])
+def test_iter_batches_of_file(tmp_path, batch_size, expected_result):
+    path = tmp_path / 'file.csv'
+    path.write_text('name,year\nalex,1985\nmark,1990\n\nalex,2000\n')
+    column_types = {'name': str, 'year': int}
+
+    batches = list(iter_batches_of_file(path, column_types, batch_size))
+
+    assert [len(batch) for batch in batches] == expected_result
+    assert sum(batches, []) == [
+        {'name': 'alex', 'year': 1985},
+        {'name': 'mark', 'year': 1990},
+        {'name': 'alex', 'year': 2000},
+    ]
+
+
+def test_dictionaries_of_read_lines_of_file(tmp_path):
+    path = tmp_path / 'file.csv'
+    path.write_text('name,year\nalex,1985\nmark,1990\nalex,2000\n')
+    dictionaries = {}
+
+    list_objs = read_lines_of_file(
+        path,
+        {'name': str, 'year': int},
+        dictionaries
+    )
+
+    assert list(dictionaries) == ['name']
+    assert dictionaries['name'].values == ['alex', 'mark']
+    assert list(list_objs.codes) == ['name']
+    assert list(list_objs.codes['name']) == [0, 1, 0]
+    assert list_objs[0]['name'] is list_objs[2]['name']
+
+
+def test_cardinality_of_string_dictionary():
+    dictionary = StringDictionary(max_size=2)
+
+    assert list(dictionary.encode_all(['alex', 'mark', 'alex'])) == [0, 1, 0]
+    assert dictionary.encode_all(['cole']) is None
+    assert dictionary.is_dropped
+    assert dictionary.encode_all(['alex']) is None
+
+
+@pytest.fixture
+def csv_file_for_columns(tmp_path):
+    path = tmp_path / 'file.csv'
+    rows = [['name', 'year', 'age']] + [
+        [name, str(1980 + i), str(20.5 + i)]
+        for i, name in enumerate(['mark', 'alex', 'cole', 'alex', 'nick'])
+    ]
+
+    with open(path, 'w', newline='') as csvfile:
+        csv.writer(csvfile).writerows(rows)
+
+    return path
+
+
+@pytest.mark.parametrize('compression', ['none', 'zlib'])
+def test_write_columnar_file(tmp_path, csv_file_for_columns, compression):
+    column_types = get_column_types(csv_file_for_columns)
+    out_path = tmp_path / 'file.cols'
+
+    write_columnar_file(
+        csv_file_for_columns, str(out_path), column_types, compression,
+        row_group_size=2
+    )
+
+    with ColumnarFile(out_path) as columnar_file:
+        assert columnar_file.column_types == column_types
+        assert len(columnar_file.row_groups) == 3
+        assert columnar_file.read_lines() == read_lines_of_file(
+            csv_file_for_columns, column_types
+        )
+        assert columnar_file.read_lines(columns=['age']) == [
+            {'age': 20.5 + i} for i in range(5)
+        ]
+
+
+@pytest.mark.parametrize('batch_size, expected_result', [
+    (1, [1, 1, 1, 1, 1]),
+    (2, [2, 1, 2]),
+    (5, [3, 2]),
+])
+def test_batch_size_of_columnar_file(
+    tmp_path,
+    csv_file_for_columns,
+    batch_size,
+    expected_result
+):
+    column_types = get_column_types(csv_file_for_columns)
+    out_path = tmp_path / 'file.cols'
+    write_columnar_file(
+        csv_file_for_columns, str(out_path), column_types, row_group_size=3
+    )
+
+    with ColumnarFile(out_path) as columnar_file:
+        batches = list(columnar_file.iter_batches(batch_size=batch_size))
+
+    assert [len(batch) for batch in batches] == expected_result
+    assert [obj for batch in batches for obj in batch] == read_lines_of_file(
+        csv_file_for_columns, column_types
+    )
+    assert [
+        code for batch in batches for code in batch.codes['name']
+    ] == [0, 1, 2, 1, 3]
+
+
+@pytest.mark.parametrize('where_params, expected_result', [
+    ({'column': 'year', 'operator': '>', 'value': 1982}, [1982, 1983, 1984]),
+    ({'column': 'year', 'operator': '<', 'value': 1982}, [1980, 1981]),
+    ({'column': 'year', 'operator': '=', 'value': 1990}, []),
+    ({'column': 'name', 'operator': '=', 'value': 'mark'}, [1980, 1981]),
+])
+def test_row_groups_skipping_of_columnar_file(
+    tmp_path,
+    csv_file_for_columns,
+    where_params,
+    expected_result
+):
+    column_types = get_column_types(csv_file_for_columns)
+    out_path = tmp_path / 'file.cols'
+    write_columnar_file(
+        csv_file_for_columns, str(out_path), column_types, row_group_size=2
+    )
+
+    with ColumnarFile(out_path) as columnar_file:
+        list_objs = columnar_file.read_lines(
+            columns=['year'],
+            where_params=where_params
+        )
+
+    assert [obj['year'] for obj in list_objs] == expected_result
+
+
+def test_exception_write_columnar_file(tmp_path, csv_file_for_columns):
+    with pytest.raises(SystemExit) as e:
+        write_columnar_file(
+            csv_file_for_columns,
+            str(tmp_path / 'file.txt'),
+            get_column_types(csv_file_for_columns)
+        )
+
+    assert e.value.code == (
+        'Error: incorrect file extension in the "--convert" argument'
+    )
+
+
+def get_columnar_bytes(footer: bytes) -> bytes:
+    '''Return the columnar file with the footer and no row groups.'''
+    return (
+        main_module.COLUMNAR_MAGIC + footer
+        + struct.pack('<Q', len(footer)) + main_module.COLUMNAR_MAGIC
+    )
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'not a columnar file at all',
+    get_columnar_bytes(b'{"columns": []}'),
+    get_columnar_bytes(b'{"columns": 5, "compression": "none"}'),
+    get_columnar_bytes(
+        b'{"columns": [{"name": "a", "type": "date"}],'
+        b' "compression": "none", "row_groups": []}'
+    ),
+])
+def test_exception_columnar_file(tmp_path, data):
+    path = tmp_path / 'file.cols'
+    path.write_bytes(data)
+
+    with pytest.raises(SystemExit) as e:
+        ColumnarFile(path)
+
+    assert e.value.code == 'Error: incorrect columnar file'
+
+
 @pytest.mark.parametrize('params, expected_result', [
     # operator "="
     (
@@ -335,6 +709,46 @@ def test_get_list_where(params, expected_result):
     assert get_list_where(list_objs, params) == expected_result
 
 
+@pytest.mark.parametrize('value, expected_result', [
+    ('alex', [{'name': 'alex', 'year': 1985}, {'name': 'alex', 'year': 2000}]),
+    ('mark', [{'name': 'mark', 'year': 1990}]),
+    ('nick', []),
+])
+def test_dictionaries_of_get_list_where(value, expected_result):
+    dictionaries = {'name': StringDictionary()}
+    list_objs = convert_rows(
+        ['name', 'year'],
+        [['alex', '1985'], ['mark', '1990'], ['alex', '2000']],
+        {'name': str, 'year': int},
+        dictionaries
+    )
+    params = {'column': 'name', 'operator': '=', 'value': value}
+
+    assert get_list_where(
+        list_objs, params, dictionaries
+    ) == expected_result
+
+
+def test_dictionaries_of_get_list_where_after_sort(tmp_path):
+    path = tmp_path / 'file.csv'
+    path.write_text('name,year\nmark,1\nalex,2\ncole,3\n')
+    dictionaries = {}
+    list_objs = read_lines_of_file(
+        path,
+        {'name': str, 'year': int},
+        dictionaries
+    )
+    list_objs = get_list_order_by(
+        list_objs,
+        {'column': 'year', 'operator': '=', 'value': 'desc'}
+    )
+    params = {'column': 'name', 'operator': '=', 'value': 'mark'}
+
+    assert get_list_where(list_objs, params, dictionaries) == [
+        {'name': 'mark', 'year': 1}
+    ]
+
+
 @pytest.mark.parametrize('params, expected_result', [
     # value "avg"
     (
@@ -363,6 +777,35 @@ def test_get_list_where(params, expected_result):
         {'column': 'age', 'operator': '=', 'value': 'max'},
         [('max',), (40.5,)]
     ),
+    # other values
+    (
+        {'column': 'year', 'operator': '=', 'value': 'count'},
+        [('count',), (2,)]
+    ),
+    (
+        {'column': 'age', 'operator': '=', 'value': 'sum'},
+        [('sum',), (75.5,)]
+    ),
+    (
+        {'column': 'year', 'operator': '=', 'value': 'var'},
+        [('var',), (12.5,)]
+    ),
+    (
+        {'column': 'year', 'operator': '=', 'value': 'median'},
+        [('median',), (1987.5,)]
+    ),
+    (
+        {'column': 'year', 'operator': '=', 'value': 'p0,p100'},
+        [('p0', 'p100'), (1985, 1990)]
+    ),
+    (
+        {'column': 'name', 'operator': '=', 'value': 'count_distinct'},
+        [('count_distinct',), (2,)]
+    ),
+    (
+        {'column': 'year', 'operator': '=', 'value': 'avg,min,max'},
+        [('avg', 'min', 'max'), (1987.5, 1985, 1990)]
+    ),
 ])
 def test_aggregate_list_objs(params, expected_result):
     list_objs = [
@@ -388,6 +831,108 @@ def test_exception_aggregate_list_objs(list_objs, params, expected_result):
     assert aggregate_list_objs(list_objs, params) == expected_result
 
 
+def test_aggregate_batches():
+    params = {'column': 'year', 'operator': '=', 'value': 'count,avg,median'}
+    batches = [
+        [{'year': 1985}, {'year': 1990}],
+        [],
+        [{'year': 2000}],
+    ]
+
+    assert aggregate_batches(batches, params) == [
+        ('count', 'avg', 'median'), (3, 1991.6666666666667, 1990)
+    ]
+    assert aggregate_batches([], params) == [
+        ('count', 'avg', 'median'),
+        (
+            0,
+            'Error: There are no objects for aggregation',
+            'Error: There are no objects for aggregation'
+        )
+    ]
+
+
+@pytest.mark.parametrize('name', [
+    'avg', 'min', 'max', 'count', 'sum', 'var', 'stddev', 'median', 'p25',
+    'count_distinct',
+])
+def test_merge_accumulators(name):
+    values = [3, 1.5, 8, 8, -2, 10, 4.25, 7]
+    whole = get_accumulator(name)
+    whole.update(values)
+
+    left, right = get_accumulator(name), get_accumulator(name)
+    left.update(values[:3])
+    right.update(values[3:])
+    left.merge(right)
+
+    assert left.result() == pytest.approx(whole.result())
+
+
+@pytest.mark.parametrize('values', [
+    [5],
+    [2, 2, 2, 2],
+    [9, -1, 4, 4, 0, 7, 3.5, 12, 4],
+])
+def test_select_kth_value(values):
+    for k, expected_result in enumerate(sorted(values)):
+        assert select_kth_value(values, k) == expected_result
+
+
+@pytest.mark.parametrize('name, expected_result', [
+    ('min', 3.0),
+    ('max', 3.0),
+    ('count_distinct', 1),
+    ('median', 3.0),
+])
+@pytest.mark.parametrize('batch_size', [1, 2, 3])
+def test_accumulators_with_nan(name, expected_result, batch_size):
+    values = [float('nan'), 3.0, float('nan')]
+    accumulator = get_accumulator(name)
+
+    for i in range(0, len(values), batch_size):
+        accumulator.update(values[i:i + batch_size])
+
+    assert accumulator.result() == expected_result
+
+
+@pytest.mark.parametrize('value, expected_result', [
+    ('count', (0,)),
+    ('count_distinct', (0,)),
+    ('count,min', (0, 'Error: There are no objects for aggregation')),
+    ('min,max', ('Error: There are no objects for aggregation',)),
+])
+def test_aggregate_batches_without_objects(value, expected_result):
+    params = {'column': 'year', 'operator': '=', 'value': value}
+
+    assert aggregate_batches([[]], params) == [
+        tuple(value.split(',')),
+        expected_result
+    ]
+
+
+def test_select_kth_value_with_nan():
+    values = [float('nan'), 2.5, float('nan'), 1.5]
+
+    for _ in range(20):
+        for k in range(len(values)):
+            select_kth_value(values, k)
+
+
+@pytest.mark.parametrize('name, expected_result', [
+    ('median', 2.0),
+    ('p0', 1.5),
+    ('p100', 2.5),
+])
+def test_percentile_accumulator_with_nan(name, expected_result):
+    accumulator = get_accumulator(name)
+    accumulator.update([1.5, float('nan'), 2.5])
+    accumulator.update([float('nan')])
+
+    for _ in range(20):
+        assert accumulator.result() == expected_result
+
+
 @pytest.mark.parametrize('params, expected_result', [
     # value "asc"
     (
@@ -449,6 +994,23 @@ def test_get_list_order_by(params, expected_result):
     assert get_list_order_by(list_objs, params) == expected_result
 
 
+@pytest.mark.parametrize('value', ['asc', 'desc'])
+@pytest.mark.parametrize('max_size', [1024, 2])
+def test_dictionaries_of_get_list_order_by(value, max_size):
+    dictionaries = {'name': StringDictionary(max_size=max_size)}
+    list_objs = convert_rows(
+        ['name', 'year'],
+        [['mark', '1'], ['alex', '2'], ['mark', '3'], ['cole', '4']],
+        {'name': str, 'year': int},
+        dictionaries
+    )
+    params = {'column': 'name', 'operator': '=', 'value': value}
+
+    assert get_list_order_by(
+        list_objs, params, dictionaries
+    ) == get_list_order_by(list(list_objs), params)
+
+
 @pytest.mark.parametrize(
     'where_params, aggregate_params, order_by_params, expected_result', [
         (
@@ -537,3 +1099,529 @@ def test_exception_main(
             order_by_params=order_by_params
         )
     assert e.value.code == expected_result
+
+
+@pytest.mark.parametrize('memory_limit', [None, 10 ** 6])
+def test_main_of_batches(memory_limit):
+    batches = [
+        [{'name': 'mark', 'year': 1990}, {'name': 'alex', 'year': 1985}],
+        [{'name': 'cole', 'year': 2000}],
+    ]
+
+    assert main_of_batches(
+        batches=iter(batches),
+        where_params={'column': 'year', 'operator': '>', 'value': 1985},
+        aggregate_params=None,
+        order_by_params={'column': 'year', 'operator': '=', 'value': 'desc'},
+        memory_limit=memory_limit
+    ) == [{'name': 'cole', 'year': 2000}, {'name': 'mark', 'year': 1990}]
+
+
+def test_exception_main_of_batches():
+    batches = [[{'name': 'mark', 'year': 1990}]] * 10
+
+    with pytest.raises(SystemExit) as e:
+        main_of_batches(
+            batches=iter(batches),
+            where_params=None,
+            aggregate_params=None,
+            order_by_params=None,
+            memory_limit=1000
+        )
+
+    assert e.value.code == (
+        'Error: the result exceeds the "--memory-limit" argument'
+    )
+
+
+def test_get_size_of_batch():
+    long_name = 'x' * 1000
+    short_rows = [{'name': 'mark', 'age': 35.0}] * 2
+    long_rows = [
+        {'name': 'mark', 'age': 35.0},
+        {'name': long_name, 'age': 1.0}
+    ]
+
+    assert get_size_of_batch(long_rows) > get_size_of_batch(short_rows) + 1000
+
+    shared_rows = [{'name': long_name, 'age': 35.0} for _ in range(10)]
+    copied_rows = [
+        {'name': ''.join(['x'] * 1000), 'age': 35.0} for _ in range(10)
+    ]
+
+    assert get_size_of_batch(shared_rows) + 9000 < get_size_of_batch(
+        copied_rows
+    )
+
+
+@pytest.mark.parametrize('name', ['median', 'p90', 'count_distinct'])
+def test_memory_limit_of_aggregate_batches(name):
+    batches = [[{'age': float(i)} for i in range(100)]]
+    params = {'column': 'age', 'operator': '=', 'value': name}
+
+    assert aggregate_batches(batches, params, memory_limit=10 ** 6)
+
+    with pytest.raises(SystemExit) as e:
+        aggregate_batches(batches, params, memory_limit=1000)
+
+    assert e.value.code == (
+        'Error: the result exceeds the "--memory-limit" argument'
+    )
+
+
+def test_codes_of_iter_batches_of_table(tmp_path):
+    path = tmp_path / 'file.csv'
+    path.write_text('name,year\nmark,1\nalex,2\nmark,3\ncole,4\n')
+    dictionaries = {}
+
+    batches = list(iter_batches_of_table(
+        open_table(str(path)),
+        batch_size=2,
+        dictionaries=dictionaries
+    ))
+
+    assert [list(batch.codes['name']) for batch in batches] == [
+        [0, 1], [0, 2]
+    ]
+    assert main_of_batches(
+        batches=iter(batches),
+        where_params={'column': 'name', 'operator': '=', 'value': 'mark'},
+        aggregate_params=None,
+        order_by_params=None,
+        dictionaries=dictionaries
+    ) == [{'name': 'mark', 'year': 1}, {'name': 'mark', 'year': 3}]
+    assert main_of_batches(
+        batches=iter(batches),
+        where_params=None,
+        aggregate_params=None,
+        order_by_params={'column': 'name', 'operator': '=', 'value': 'asc'},
+        dictionaries=dictionaries
+    ) == [
+        {'name': 'alex', 'year': 2},
+        {'name': 'cole', 'year': 4},
+        {'name': 'mark', 'year': 1},
+        {'name': 'mark', 'year': 3},
+    ]
+
+
+def test_get_join_params():
+    assert get_join_params(
+        column_types={'brand': str, 'rating': float},
+        join_column_types={'brand': str, 'rating': int, 'country': str},
+        path='data/brand-info.csv',
+        params='brand'
+    ) == {
+        'column': 'brand',
+        'renames': {'rating': 'brand_info_rating'},
+        'column_types': {
+            'brand': str,
+            'rating': float,
+            'brand_info_rating': int,
+            'country': str
+        }
+    }
+
+
+@pytest.mark.parametrize('params, expected_result', [
+    (None, 'Error: the "--join" argument requires the "--on" argument'),
+    ('rating', 'Error: invalid column in the "--on" argument'),
+    ('country', 'Error: invalid column in the "--on" argument'),
+])
+def test_exception_get_join_params(params, expected_result):
+    with pytest.raises(SystemExit) as e:
+        get_join_params(
+            column_types={'brand': str, 'rating': float},
+            join_column_types={'brand': str, 'country': str},
+            path='brands.csv',
+            params=params
+        )
+
+    assert e.value.code == expected_result
+
+
+@pytest.mark.parametrize('build_is_left', [True, False])
+@pytest.mark.parametrize('memory_limit', [None, 1])
+def test_hash_join_batches(build_is_left, memory_limit):
+    left = [
+        [{'brand': 'apple', 'price': 999}, {'brand': 'xiaomi', 'price': 199}],
+        [{'brand': 'apple', 'price': 1199}, {'brand': 'nokia', 'price': 99}],
+    ]
+    right = [
+        [{'brand': 'apple', 'country': 'usa'}],
+        [{'brand': 'xiaomi', 'country': 'china'}],
+        [{'brand': 'apple', 'country': 'ireland'}],
+    ]
+
+    batches = hash_join_batches(
+        build_batches=left if build_is_left else right,
+        probe_batches=right if build_is_left else left,
+        column='brand',
+        build_is_left=build_is_left,
+        memory_limit=memory_limit,
+        partitions=2
+    )
+    joined = [row for batch in batches for row in batch]
+
+    assert all(list(row) == ['brand', 'price', 'country'] for row in joined)
+    assert sorted(joined, key=lambda row: tuple(row.values())) == [
+        {'brand': 'apple', 'price': 999, 'country': 'ireland'},
+        {'brand': 'apple', 'price': 999, 'country': 'usa'},
+        {'brand': 'apple', 'price': 1199, 'country': 'ireland'},
+        {'brand': 'apple', 'price': 1199, 'country': 'usa'},
+        {'brand': 'xiaomi', 'price': 199, 'country': 'china'},
+    ]
+
+
+@pytest.mark.parametrize('where, expected_result', [
+    (None, ['a1', 'a2', 'x1']),
+    ('brand=apple', ['a1', 'a2']),
+    ('country=china', ['x1']),
+    ('products_rating>4', ['x1']),
+    ('rating>4', ['a1', 'a2']),
+])
+def test_get_joined_batches(tmp_path, where, expected_result):
+    orders_path = tmp_path / 'orders.csv'
+    orders_path.write_text(
+        'order,brand,rating\na1,apple,4.5\nx1,xiaomi,2.5\na2,apple,5.0\n'
+    )
+    products_path = tmp_path / 'products.csv'
+    products_path.write_text(
+        'brand,rating,country\napple,3,usa\nxiaomi,5,china\n'
+    )
+
+    table = open_table(str(orders_path))
+    join_table = open_table(str(products_path))
+    join_params = get_join_params(
+        table['column_types'],
+        join_table['column_types'],
+        join_table['path'],
+        'brand'
+    )
+    where_params = get_where_params(join_params['column_types'], where)
+
+    batches = get_joined_batches(table, join_table, join_params, where_params)
+
+    assert not is_left_build_side(table, join_table)
+    assert sorted(
+        row['order'] for batch in batches for row in batch
+    ) == expected_result
+
+
+def test_get_queries_params(tmp_path):
+    path = tmp_path / 'batch.jsonl'
+    path.write_text(
+        '{"where": "year>1985", "aggregate": "age=avg,max"}\n'
+        '\n'
+        '{"order_by": "name=desc", "output": "out.txt"}\n'
+    )
+    column_types = {'name': str, 'year': int, 'age': float}
+
+    assert get_queries_params(column_types, path) == [
+        {
+            'where': {'column': 'year', 'operator': '>', 'value': 1985},
+            'aggregate': {
+                'column': 'age', 'operator': '=', 'value': 'avg,max'
+            },
+            'order_by': None,
+            'output': None
+        },
+        {
+            'where': None,
+            'aggregate': None,
+            'order_by': {'column': 'name', 'operator': '=', 'value': 'desc'},
+            'output': 'out.txt'
+        },
+    ]
+    assert get_queries_params(column_types, None) is None
+
+
+@pytest.mark.parametrize('text, expected_result', [
+    (
+        '{"where": "year>1"',
+        'Error: incorrect format of the "--queries" argument'
+    ),
+    (
+        '["year>1"]',
+        'Error: incorrect format of the "--queries" argument'
+    ),
+    (
+        '{"limit": "1"}',
+        'Error: incorrect format of the "--queries" argument'
+    ),
+    (
+        '{"where": 1}',
+        'Error: incorrect format of the "--queries" argument'
+    ),
+    ('{"where": "h>1"}', 'Error: invalid column in the "--where" argument'),
+    (
+        '{"aggregate": "year=avg", "order_by": "year=asc"}',
+        'Error: the "--order-by" argument is not accepted together '
+        'with the "--aggregate" argument'
+    ),
+])
+def test_exception_get_queries_params(tmp_path, text, expected_result):
+    path = tmp_path / 'batch.jsonl'
+    path.write_text(text)
+
+    with pytest.raises(SystemExit) as e:
+        get_queries_params({'name': str, 'year': int, 'age': float}, path)
+
+    assert e.value.code == expected_result
+
+
+def test_run_queries():
+    batches = [
+        [
+            {'name': 'mark', 'year': 1990, 'age': 35.0},
+            {'name': 'alex', 'year': 1985, 'age': 40.5},
+        ],
+        [{'name': 'cole', 'year': 2000, 'age': 25.0}],
+    ]
+    where_params = {'column': 'year', 'operator': '>', 'value': 1985}
+    queries = [
+        {
+            'where': where_params,
+            'aggregate': {'column': 'age', 'operator': '=', 'value': 'avg'},
+            'order_by': None,
+            'output': None
+        },
+        {
+            'where': None,
+            'aggregate': {'column': 'year', 'operator': '=', 'value': 'min'},
+            'order_by': None,
+            'output': None
+        },
+        {
+            'where': where_params,
+            'aggregate': None,
+            'order_by': {'column': 'name', 'operator': '=', 'value': 'asc'},
+            'output': None
+        },
+    ]
+
+    assert run_queries(iter(batches), queries) == [
+        [('avg',), (30.0,)],
+        [('min',), (1985,)],
+        [
+            {'name': 'cole', 'year': 2000, 'age': 25.0},
+            {'name': 'mark', 'year': 1990, 'age': 35.0},
+        ],
+    ]
+
+
+def test_write_queries_results(tmp_path, capsys):
+    output = tmp_path / 'out.txt'
+    queries = [
+        {'where': None, 'aggregate': None, 'order_by': None, 'output': None},
+        {
+            'where': None,
+            'aggregate': {'column': 'year', 'operator': '=', 'value': 'min'},
+            'order_by': None,
+            'output': str(output)
+        },
+    ]
+
+    write_queries_results(queries, [[{'year': 1985}], [('min',), (1985,)]])
+
+    assert capsys.readouterr().out.startswith('Query 1:\n+--------+')
+    assert output.read_text().splitlines()[1] == '|   min |'
+
+
+@pytest.mark.parametrize('data, expected_result', [
+    (b'name,year\nalex,1985\nmark,1990', [10, 20]),
+    (b'name,year\r\nalex,1985\r\n\r\nmark,1990\r\n', [11, 24]),
+    (b'name,year\n"alex\nsmith",1985\nmark,1990\n', [10, 28]),
+    (b'name,year\n', []),
+    (b'name,size\nTV 55",100\nTV,50\n', [10, 21]),
+    (b'name,year\n"a ""b""\nc",1\nd,2\n', [10, 24]),
+    (b'name,year\n\xc3\xa9,1\nb,2\n', [10, 15]),
+])
+def test_row_index(tmp_path, data, expected_result):
+    path = tmp_path / 'file.csv'
+    path.write_bytes(data)
+
+    row_index = RowIndex(path)
+    count = len(expected_result)
+
+    assert row_index.wait() == count
+    assert list(row_index.offsets) == expected_result
+    assert row_index.end == len(data)
+    assert row_index.get_range(count, count + 2) == (len(data), len(data))
+
+
+def test_stray_quote_of_pager_source(tmp_path):
+    path = tmp_path / 'file.csv'
+    path.write_text(
+        'name,size\n'
+        'TV 55",100\n'
+        + ''.join(f'name{i},{i}\n' for i in range(10))
+    )
+    column_types = get_column_types(path)
+    list_objs = read_lines_of_file(path, column_types)
+    source = PagerSource(path, column_types)
+
+    source.set_view(
+        order_by_params={'column': 'size', 'operator': '=', 'value': 'desc'}
+    )
+
+    assert source.row_index.wait() == len(list_objs)
+    assert source.get_rows(0, 5) == sorted(
+        list_objs, key=lambda obj: obj['size'], reverse=True
+    )[:5]
+
+
+@pytest.fixture
+def pager_source(tmp_path):
+    path = tmp_path / 'file.csv'
+    path.write_text(
+        'name,year,age\n'
+        'mark,1990,35.0\n'
+        '"alex\nsmith",1985,40.5\n'
+        '\n'
+        'cole,2000,25.0\n'
+        'nick,1985,30.5\n'
+    )
+    column_types = get_column_types(path)
+    return PagerSource(path, column_types), read_lines_of_file(
+        path, column_types
+    )
+
+
+@pytest.mark.parametrize('start, count', [(0, 2), (1, 10), (3, 1), (4, 5)])
+def test_get_rows_of_pager_source(pager_source, start, count):
+    source, list_objs = pager_source
+
+    assert source.get_rows(start, count) == list_objs[start:start + count]
+    assert source.get_row_count() == 4
+
+
+@pytest.mark.parametrize('where_params, order_by_params', [
+    ({'column': 'year', 'operator': '=', 'value': 1985}, None),
+    (None, {'column': 'year', 'operator': '=', 'value': 'desc'}),
+    (None, {'column': 'name', 'operator': '=', 'value': 'asc'}),
+    (
+        {'column': 'age', 'operator': '<', 'value': 40.0},
+        {'column': 'year', 'operator': '=', 'value': 'asc'}
+    ),
+])
+def test_set_view_of_pager_source(
+    pager_source,
+    where_params,
+    order_by_params
+):
+    source, list_objs = pager_source
+
+    if where_params:
+        list_objs = get_list_where(list_objs, where_params)
+    if order_by_params:
+        list_objs = get_list_order_by(list_objs, order_by_params)
+
+    source.set_view(where_params, order_by_params)
+
+    assert source.get_row_count() == len(list_objs)
+    assert source.get_rows(0, 10) == list_objs
+    assert source.get_rows(1, 2) == list_objs[1:3]
+
+    source.set_view()
+    assert source.get_rows(0, 1) == [
+        {'name': 'mark', 'year': 1990, 'age': 35.0}
+    ]
+
+
+def test_render_page():
+    lines, spans = render_page(
+        [{'name': 'alex', 'year': 1985}, {'name': 'cole', 'year': 2000}],
+        ['name', 'year']
+    )
+
+    assert lines == [
+        'name      year',
+        '------  ------',
+        'alex      1985',
+        'cole      2000',
+    ]
+    assert spans == [(0, 6), (8, 14)]
+
+
+class FakeScreen:
+    '''Screen of the pager which presses the given keys.'''
+
+    def __init__(self, keys: list):
+        self.keys = keys
+        self.status_lines = []
+
+    def getmaxyx(self) -> tuple:
+        return 10, 60
+
+    def getch(self) -> int:
+        return self.keys.pop(0)
+
+    def addnstr(self, y, x, text, n, *attr) -> None:
+        if y == 9:
+            self.status_lines.append(text)
+
+    def timeout(self, delay) -> None:
+        pass
+
+    def erase(self) -> None:
+        pass
+
+    def move(self, y, x) -> None:
+        pass
+
+    def clrtoeol(self) -> None:
+        pass
+
+    def chgat(self, *args) -> None:
+        pass
+
+    def refresh(self) -> None:
+        pass
+
+
+def test_run_pager_redraws_status_only_on_timeout(monkeypatch, pager_source):
+    import curses
+
+    monkeypatch.setattr(curses, 'curs_set', lambda visibility: None)
+    source, list_objs = pager_source
+    source.row_index.wait()
+    calls = []
+    get_rows = source.get_rows
+    monkeypatch.setattr(
+        source,
+        'get_rows',
+        lambda start, count: calls.append(start) or get_rows(start, count)
+    )
+    screen = FakeScreen([-1, -1, -1, ord('j'), -1, -1, ord('q')])
+
+    run_pager(screen, source)
+
+    assert calls == [0, 1]
+    assert len(screen.status_lines) == 7
+    assert screen.status_lines[-1].startswith('rows 2-4 of 4')
+
+
+@pytest.mark.parametrize('prefetch_depth', [0, 3])
+def test_prefetch_depth_of_pager_source(
+    monkeypatch,
+    tmp_path,
+    prefetch_depth
+):
+    path = tmp_path / 'file.csv'
+    path.write_text('name,year\nmark,1990\nalex,1985\n')
+    depths = []
+    open_csv_file = main_module.open_csv_file
+    monkeypatch.setattr(
+        main_module,
+        'open_csv_file',
+        lambda path, csv_format, depth: depths.append(depth)
+        or open_csv_file(path, csv_format, depth)
+    )
+    source = PagerSource(
+        path,
+        {'name': str, 'year': int},
+        prefetch_depth=prefetch_depth
+    )
+
+    assert source.get_column('year') == [1990, 1985]
+    assert depths == [prefetch_depth]
@@ -1,9 +1,24 @@
+from array import array
+import codecs
+from contextlib import ExitStack
 import csv
+import io
+from itertools import chain, islice
+import json
+import math
+import mmap
 import os
-from operator import itemgetter
+import pickle
+import queue
+import random
+from operator import eq, gt, itemgetter, lt
 import re
+import struct
 import sys
-from typing import List
+import tempfile
+import threading
+import zlib
+from typing import Iterable, Iterator, List
 
 import argparse
 from tabulate import tabulate
@@ -38,6 +53,94 @@ def get_args():
         type=str,
         help='Sorting parameter in the "column=value" format'
     )
+    parser.add_argument(
+        '-d',
+        '--delimiter',
+        type=str,
+        help='The delimiter of the csv file, detected if not given'
+    )
+    parser.add_argument(
+        '-q',
+        '--quotechar',
+        type=str,
+        default='"',
+        help='The quote character of the csv file'
+    )
+    parser.add_argument(
+        '-e',
+        '--encoding',
+        type=str,
+        default='utf-8',
+        help='The encoding of the csv file'
+    )
+    parser.add_argument(
+        '-j',
+        '--join',
+        type=str,
+        help='The path to the csv or columnar file to join with'
+    )
+    parser.add_argument(
+        '-on',
+        '--on',
+        type=str,
+        help='The column to join the files on'
+    )
+    parser.add_argument(
+        '-qs',
+        '--queries',
+        type=str,
+        help='The path to the ".jsonl" file of queries run in a single pass'
+    )
+    parser.add_argument(
+        '-p',
+        '--pager',
+        action='store_true',
+        help='Browse the csv file page by page in the terminal'
+    )
+    parser.add_argument(
+        '-c',
+        '--convert',
+        type=str,
+        help='The path to the columnar ".cols" file to convert the csv file to'
+    )
+    parser.add_argument(
+        '-cp',
+        '--compression',
+        type=str,
+        choices=COLUMNAR_COMPRESSIONS,
+        default='none',
+        help='Compression of the columnar file'
+    )
+    parser.add_argument(
+        '-pd',
+        '--prefetch-depth',
+        type=int,
+        default=0,
+        help='The number of blocks read ahead by a background thread, '
+             '0 (the default) to disable'
+    )
+    parser.add_argument(
+        '-bs',
+        '--batch-size',
+        type=int,
+        default=BATCH_SIZE,
+        help='The number of rows read and processed at a time'
+    )
+    parser.add_argument(
+        '-ml',
+        '--memory-limit',
+        type=int,
+        help='The memory limit of the kept rows and aggregation values '
+             'in megabytes'
+    )
+    parser.add_argument(
+        '-jml',
+        '--join-memory-limit',
+        type=int,
+        default=JOIN_MEMORY_LIMIT // (1024 * 1024),
+        help='The memory limit of the "--join" hash table in megabytes, '
+             'above it the join spills to disk'
+    )
     args = parser.parse_args()
     return args
 
@@ -46,7 +149,7 @@ def get_path_to_csv_file(
     path: str | None,
     listdir: list = os.listdir()
 ) -> str:
-    '''Return the path to the csv file, or terminate the program.'''
+    '''Return the path to the csv or columnar file, or terminate.'''
     if path == None:
         for path_in_dir in listdir:
             root, ext = os.path.splitext(path_in_dir)
@@ -57,7 +160,7 @@ def get_path_to_csv_file(
 
     elif os.path.isfile(path):
         root, ext = os.path.splitext(path)
-        if ext == '.csv':
+        if ext in ('.csv', '.cols'):
             return path
 
         sys.exit('Error: incorrect file extension')
@@ -66,12 +169,297 @@ def get_path_to_csv_file(
         sys.exit('Error: file not found')
 
 
-def get_column_types(path: str) -> dict:
+CSV_FORMAT = {'delimiter': ',', 'quotechar': '"', 'encoding': 'utf-8'}
+SNIFF_DELIMITERS = ',;\t|'
+SNIFF_SAMPLE_SIZE = 65536
+READ_BLOCK_SIZE = 1 << 20
+
+
+def get_csv_format(
+    path: str,
+    delimiter: str | None = None,
+    quotechar: str = '"',
+    encoding: str = 'utf-8'
+) -> dict:
+    '''Return the dictionary with the csv format, detecting the delimiter.'''
+    if delimiter in ('\\t', 'tab'):
+        delimiter = '\t'
+
+    if delimiter is not None and len(delimiter) != 1:
+        sys.exit('Error: invalid value in the "--delimiter" argument')
+
+    if len(quotechar) != 1:
+        sys.exit('Error: invalid value in the "--quotechar" argument')
+
+    try:
+        with open(path, encoding=encoding) as file:
+            sample = file.read(SNIFF_SAMPLE_SIZE)
+    except LookupError:
+        sys.exit('Error: invalid value in the "--encoding" argument')
+    except UnicodeDecodeError:
+        sys.exit('Error: the file does not match the "--encoding" argument')
+
+    if delimiter is None:
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS)
+            delimiter = dialect.delimiter
+        except csv.Error:
+            delimiter = CSV_FORMAT['delimiter']
+
+    csv_format = {
+        'delimiter': delimiter,
+        'quotechar': quotechar,
+        'encoding': encoding
+    }
+    return csv_format
+
+
+def iter_runs_of_rows(file, csv_format: dict) -> Iterator[Iterator]:
+    '''Yield the iterators over the runs of rows of the opened csv file.
+
+    The file is read in large blocks cut at the line breaks. The first
+    block is parsed by "csv.reader", which also finds the number of the
+    columns. In every next block without quote characters, the line
+    breaks are replaced with the delimiter, the whole block is split at
+    once and the fields are grouped into tuples by the number of the
+    columns. A blank line changes the number of the fields, so such a
+    block, like a block with quotes, is parsed by "csv.reader". Every row
+    takes at least one line, so the rows are taken in runs no longer than
+    the lines left in the block; when a row has a quoted line break,
+    "csv.reader" goes on with the lines read from the file one by one.
+    '''
+    delimiter = csv_format['delimiter']
+    quotechar = csv_format['quotechar']
+    column_count = None
+    tail = ''
+
+    def read_lines() -> Iterator[str]:
+        '''Yield the lines of the file after the block.'''
+        nonlocal tail
+        line, tail = tail + file.readline(), ''
+
+        while line:
+            yield line
+            line = file.readline()
+
+    while True:
+        text = file.read(READ_BLOCK_SIZE)
+        if not text:
+            if not tail:
+                return
+            block, tail = tail, ''
+        else:
+            text = tail + text
+            end = text.rfind('\n') + 1
+            block, tail = text[:end], text[end:]
+            if not block:
+                continue
+
+        if column_count is not None and quotechar not in block:
+            text = block[:-1] if block.endswith('\n') else block
+            line_count = text.count('\n') + 1
+            fields = text.replace('\n', delimiter).split(delimiter)
+
+            if len(fields) == line_count * column_count and (
+                column_count > 1 or '' not in fields
+            ):
+                yield zip(*[iter(fields)] * column_count)
+                continue
+
+        line_count = block.count('\n') + (not block.endswith('\n'))
+        rows = csv.reader(
+            chain(io.StringIO(block), read_lines()),
+            delimiter=delimiter,
+            quotechar=quotechar
+        )
+
+        if column_count is None:
+            for row in rows:
+                yield [row]
+                if row:
+                    column_count = len(row)
+                    break
+
+        while rows.line_num < line_count:
+            yield islice(rows, line_count - rows.line_num)
+
+
+def iter_rows_of_file(file, csv_format: dict | None = None) -> Iterator:
+    '''Return the iterator over the rows of the opened csv file.
+
+    The rows are sequences of strings, see "iter_runs_of_rows".
+    '''
+    if csv_format is None:
+        csv_format = CSV_FORMAT
+
+    return chain.from_iterable(iter_runs_of_rows(file, csv_format))
+
+
+PREFETCH_DEPTH = 2
+
+
+class PrefetchReader:
+    '''Binary file read ahead in blocks by a background thread.
+
+    The thread reads with "readinto" into a ring of "depth + 1" reusable
+    buffers, so up to "depth" blocks wait for the consumer while the next
+    one is being read.
+    '''
+
+    def __init__(
+        self,
+        path: str,
+        depth: int = PREFETCH_DEPTH,
+        block_size: int = READ_BLOCK_SIZE
+    ):
+        self.file = open(path, 'rb', buffering=0)
+
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(
+                self.file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL
+            )
+
+        self.buffers = [bytearray(block_size) for _ in range(depth + 1)]
+        self.free_buffers = queue.Queue()
+        self.filled_buffers = queue.Queue()
+
+        for index in range(len(self.buffers)):
+            self.free_buffers.put(index)
+
+        self.thread = threading.Thread(target=self.read_ahead, daemon=True)
+        self.thread.start()
+
+    def read_ahead(self) -> None:
+        '''Fill the free buffers until the end of the file.'''
+        try:
+            while (index := self.free_buffers.get()) is not None:
+                size = self.file.readinto(self.buffers[index])
+                self.filled_buffers.put((index, size))
+
+                if size == 0:
+                    return
+        except Exception as error:
+            self.filled_buffers.put(error)
+
+    def decode_block(self, decoder) -> str | None:
+        '''Decode the next block and return it, or None at the end.'''
+        item = self.filled_buffers.get()
+        if isinstance(item, Exception):
+            raise item
+
+        index, size = item
+        if size == 0:
+            self.filled_buffers.put(item)
+            return None
+
+        try:
+            with memoryview(self.buffers[index])[:size] as data:
+                return decoder.decode(data)
+        finally:
+            self.free_buffers.put(index)
+
+    def close(self) -> None:
+        '''Stop the thread and close the file.'''
+        self.free_buffers.put(None)
+        self.thread.join()
+        self.file.close()
+
+
+class PrefetchTextFile:
+    '''Text file over PrefetchReader for "iter_rows_of_file".
+
+    The text is decoded like "open" does, with the universal newlines.
+    '''
+
+    def __init__(
+        self,
+        path: str,
+        encoding: str = 'utf-8',
+        depth: int = PREFETCH_DEPTH,
+        block_size: int = READ_BLOCK_SIZE
+    ):
+        self.reader = PrefetchReader(path, depth, block_size)
+        self.decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(),
+            translate=True
+        )
+        self.text = ''
+        self.is_finished = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def read_text(self) -> str:
+        '''Return the text of the next block, or '' at the end.'''
+        while not self.is_finished:
+            text = self.reader.decode_block(self.decoder)
+
+            if text is None:
+                self.is_finished = True
+                return self.decoder.decode(b'', final=True)
+
+            if text:
+                return text
+
+        return ''
+
+    def read(self, size: int = -1) -> str:
+        '''Return the next block of text; "size" is not used.'''
+        if self.text:
+            text, self.text = self.text, ''
+            return text
+
+        return self.read_text()
+
+    def readline(self) -> str:
+        '''Return the next line with its line break.'''
+        while '\n' not in self.text and (text := self.read_text()):
+            self.text += text
+
+        line, newline, self.text = self.text.partition('\n')
+        return line + newline
+
+    def close(self) -> None:
+        '''Stop reading the file.'''
+        self.reader.close()
+
+
+def open_csv_file(
+    path: str,
+    csv_format: dict | None = None,
+    prefetch_depth: int = 0
+):
+    '''Open the csv file as text, reading ahead if "prefetch_depth" > 0.'''
+    if csv_format is None:
+        csv_format = CSV_FORMAT
+
+    if prefetch_depth > 0:
+        return PrefetchTextFile(path, csv_format['encoding'], prefetch_depth)
+
+    return open(path, encoding=csv_format['encoding'])
+
+
+def get_column_types(path: str, csv_format: dict | None = None) -> dict:
     '''Return the dictionary of columns and their types.'''
-    with open(path) as file:
-        reader = csv.reader(file)
+    if csv_format is None:
+        csv_format = CSV_FORMAT
+
+    with open(path, encoding=csv_format['encoding']) as file:
+        reader = iter_rows_of_file(file, csv_format)
         headers = next(reader)
-        row_values = next(reader)
+        row_values = list(next(reader))
 
     for i in range(len(row_values)):
         if row_values[i].isdigit():
@@ -123,14 +511,12 @@ def get_where_params(column_types: dict, params: str) -> dict | None:
 
 def get_aggregate_params(column_types: dict, params: str) -> dict | None:
     '''Return the dictionary with the aggregation parameters.'''
-    allowed_values = ['avg', 'min', 'max']
-
     if params == None:
         return None
 
     try:
         pat = re.compile(
-            r'(?P<column>(\w+\s?)+)(?P<operator>=)(?P<value>\w+)'
+            r'(?P<column>(\w+\s?)+)(?P<operator>=)(?P<value>\w+(,\w+)*)'
         )
         match = pat.search(params)
         aggregate_params = match.groupdict()
@@ -140,10 +526,14 @@ def get_aggregate_params(column_types: dict, params: str) -> dict | None:
     if aggregate_params['column'] not in column_types:
         sys.exit('Error: invalid column in the "--aggregate" argument')
 
-    if column_types[aggregate_params['column']] == str:
+    names = aggregate_params['value'].split(',')
+
+    if column_types[aggregate_params['column']] == str and any(
+        name not in STRING_AGGREGATE_FUNCTIONS for name in names
+    ):
         sys.exit('Error: invalid column type in the "--aggregate" argument')
 
-    if aggregate_params['value'] not in allowed_values:
+    if any(get_accumulator(name) is None for name in names):
         sys.exit('Error: invalid value in the "--aggregate" argument')
 
     return aggregate_params
@@ -174,157 +564,2135 @@ def get_order_by_params(column_types: dict, params: str) -> dict | None:
     return order_by_params
 
 
-def read_lines_of_file(path: str, column_types: dict) -> List[dict]:
-    '''Read the file and return the list of dictionaries with string data.'''
-    with open(path) as file:
-        list_objs = []
-        headers = column_types.keys()
-        reader = csv.DictReader(file)
+DICTIONARY_MAX_SIZE = 1024
+
+
+class StringDictionary:
+    '''Dictionary encoding of a text column.
+
+    Every unique value of the column is stored once in the code table,
+    and every batch keeps the codes of its rows, see Batch. A column with
+    more than "max_size" unique values gains nothing from the encoding,
+    so its dictionary is dropped and the values are kept as they are.
+    '''
+
+    def __init__(self, max_size: int = DICTIONARY_MAX_SIZE):
+        self.values = []
+        self.codes_by_value = {}
+        self.max_size = max_size
+        self.is_dropped = False
+        self.codes_in_order = None
+
+    def get_code(self, value: str) -> int:
+        '''Return the code of the value, adding it to the code table.'''
+        code = self.codes_by_value.get(value)
 
-        for row in reader:
-            for header in headers:
-                if column_types[header] == int:
-                    row[header] = int(row[header])
-                elif column_types[header] == float:
-                    row[header] = float(row[header])
+        if code is None:
+            code = len(self.values)
+            self.codes_by_value[value] = code
+            self.values.append(value)
+            self.codes_in_order = None
+
+        return code
+
+    def drop(self) -> None:
+        '''Stop encoding the column and free the code table.'''
+        self.values = []
+        self.codes_by_value = {}
+        self.codes_in_order = None
+        self.is_dropped = True
+
+    def encode_all(self, values: Iterable[str]) -> array | None:
+        '''Return the codes of the values, or None if the column is dropped.'''
+        if self.is_dropped:
+            return None
+
+        codes_by_value = self.codes_by_value
+        codes = array('I', [
+            codes_by_value[value] if value in codes_by_value
+            else self.get_code(value)
+            for value in values
+        ])
+
+        if len(self.values) > self.max_size:
+            self.drop()
+            return None
+        return codes
+
+    def translate(self, values: list, codes: list) -> array | None:
+        '''Return the codes of the rows encoded with another code table.'''
+        if self.is_dropped:
+            return None
+
+        own_codes = [self.get_code(value) for value in values]
+
+        if len(self.values) > self.max_size:
+            self.drop()
+            return None
+        return array('I', map(own_codes.__getitem__, codes))
+
+    def decode_all(self, codes: array) -> list:
+        '''Return the shared str objects of the codes.'''
+        return list(map(self.values.__getitem__, codes))
+
+    def get_codes_in_order(self) -> list:
+        '''Return the codes sorted by their values.'''
+        if self.codes_in_order is None:
+            self.codes_in_order = sorted(
+                range(len(self.values)),
+                key=self.values.__getitem__
+            )
+
+        return self.codes_in_order
+
+
+class Batch(list):
+    '''List of dictionaries with the codes of its encoded text columns.
+
+    "codes" maps a column to the array of the codes of the rows in the
+    order of the list. Sorting or changing the list returns a plain list,
+    whose rows are compared by their values.
+    '''
+
+    def __init__(
+        self,
+        list_objs: Iterable[dict] = (),
+        codes: dict | None = None
+    ):
+        super().__init__(list_objs)
+        self.codes = {} if codes is None else codes
+
+    def extend_batch(self, batch: List[dict]) -> None:
+        '''Add the rows of the batch, keeping the codes both of them have.'''
+        if not batch:
+            return
+
+        codes = getattr(batch, 'codes', {})
+
+        if not self:
+            self.codes = {
+                column: array('I', column_codes)
+                for column, column_codes in codes.items()
+            }
+        else:
+            for column in list(self.codes):
+                if column in codes:
+                    self.codes[column].extend(codes[column])
+                else:
+                    del self.codes[column]
+
+        self.extend(batch)
+
+
+BATCH_SIZE = 65536
+
+
+def convert_rows(
+    headers: list,
+    rows: List[list],
+    column_types: dict,
+    dictionaries: dict | None = None
+) -> Batch:
+    '''Return the dictionaries with typed data, converted column by column.'''
+    columns = []
+    codes = {}
+
+    for i, header in enumerate(headers):
+        values = [row[i] for row in rows]
+        dictionary = (dictionaries or {}).get(header)
+        column_codes = dictionary and dictionary.encode_all(values)
+
+        if column_codes is not None:
+            codes[header] = column_codes
+            columns.append(dictionary.decode_all(column_codes))
+        else:
+            columns.append(list(map(column_types[header], values)))
+
+    return Batch([dict(zip(headers, row)) for row in zip(*columns)], codes)
+
+
+def iter_batches_of_file(
+    path: str,
+    column_types: dict,
+    batch_size: int = BATCH_SIZE,
+    dictionaries: dict | None = None,
+    csv_format: dict | None = None,
+    prefetch_depth: int = 0
+) -> Iterator[Batch]:
+    '''Read the file and yield the batches of dictionaries with typed data.
+
+    Every batch is converted column by column, and the next batch is read
+    only when the previous one is taken, so memory does not depend on the
+    file size. Text columns are dictionary-encoded, see StringDictionary
+    and Batch. With "prefetch_depth" the file is read ahead in a background
+    thread.
+    '''
+    if dictionaries is None:
+        dictionaries = {}
+
+    if csv_format is None:
+        csv_format = CSV_FORMAT
+
+    for header, column_type in column_types.items():
+        if column_type == str:
+            dictionaries[header] = StringDictionary()
+
+    with open_csv_file(path, csv_format, prefetch_depth) as file:
+        reader = iter_rows_of_file(file, csv_format)
+        headers = next(reader)
 
-            list_objs.append(row)
+        while chunk := list(islice(reader, batch_size)):
+            rows = [row for row in chunk if row]
+            if rows:
+                yield convert_rows(headers, rows, column_types, dictionaries)
 
-        return list_objs
 
+def read_lines_of_file(
+    path: str,
+    column_types: dict,
+    dictionaries: dict | None = None,
+    csv_format: dict | None = None
+) -> Batch:
+    '''Read the file and return the list of dictionaries with string data.
+
+    Text columns are dictionary-encoded: rows share one str object per
+    unique value, the list keeps the codes of the rows and the code tables
+    are saved to "dictionaries" if it is given.
+    '''
+    list_objs = Batch()
+
+    for batch in iter_batches_of_file(
+        path=path,
+        column_types=column_types,
+        dictionaries=dictionaries,
+        csv_format=csv_format
+    ):
+        list_objs.extend_batch(batch)
+
+    return list_objs
+
+
+COLUMNAR_MAGIC = b'CSVCOLS1'
+COLUMNAR_ROW_GROUP_SIZE = 65536
+COLUMNAR_COMPRESSIONS = ['none', 'zlib']
+COLUMNAR_TYPES = {int: 'int', float: 'float', str: 'str'}
+COLUMNAR_TYPECODES = {int: 'q', float: 'd', str: 'I'}
+
+
+def pack_array(values: array) -> bytes:
+    '''Return the little-endian bytes of the array.'''
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_array(typecode: str, data) -> list:
+    '''Return the list of values from the little-endian bytes.'''
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tolist()
+
+
+def get_column_stats(values: list) -> dict | None:
+    '''Return the min/max statistics of the column chunk.'''
+    if not values or any(value != value for value in values):
+        return None
+    return {'min': min(values), 'max': max(values)}
+
+
+def write_row_group(
+    file,
+    rows: List[list],
+    column_types: dict,
+    compression: str
+) -> dict:
+    '''Write the column chunks of the rows and return their metadata.'''
+
+    def write_buffer(data: bytes) -> dict:
+        if compression == 'zlib':
+            data = zlib.compress(data)
+        offset = file.tell()
+        file.write(data)
+        return {'offset': offset, 'length': len(data)}
+
+    columns = {}
+
+    for i, (header, column_type) in enumerate(column_types.items()):
+        values = [row[i] for row in rows]
+
+        if column_type == str:
+            codes_by_value = {}
+            codes = array('I', [
+                codes_by_value.setdefault(value, len(codes_by_value))
+                for value in values
+            ])
+
+            chunk = write_buffer(pack_array(codes))
+            chunk['dictionary'] = write_buffer(
+                json.dumps(list(codes_by_value)).encode()
+            )
+            chunk['stats'] = get_column_stats(list(codes_by_value))
+        else:
+            values = [column_type(value) for value in values]
+            try:
+                data = array(COLUMNAR_TYPECODES[column_type], values)
+            except OverflowError:
+                sys.exit('Error: the value is too large for the columnar file')
+
+            chunk = write_buffer(pack_array(data))
+            chunk['stats'] = get_column_stats(values)
+
+        columns[header] = chunk
+
+    return {'num_rows': len(rows), 'columns': columns}
+
+
+def write_columnar_file(
+    path: str,
+    out_path: str,
+    column_types: dict,
+    compression: str = 'none',
+    row_group_size: int = COLUMNAR_ROW_GROUP_SIZE,
+    csv_format: dict | None = None
+) -> None:
+    '''Convert the csv file to the columnar file with the typed columns.
+
+    The file consists of the row groups with a buffer per column and the
+    JSON footer with the schema, the buffer offsets and min/max statistics.
+    '''
+    if os.path.splitext(out_path)[1] != '.cols':
+        sys.exit('Error: incorrect file extension in the "--convert" argument')
+
+    if csv_format is None:
+        csv_format = CSV_FORMAT
+
+    with (
+        open(path, encoding=csv_format['encoding']) as file,
+        open(out_path, 'wb') as out
+    ):
+        reader = iter_rows_of_file(file, csv_format)
+        next(reader)
+        out.write(COLUMNAR_MAGIC)
+        row_groups = []
+
+        while chunk := list(islice(reader, row_group_size)):
+            rows = [row for row in chunk if row]
+            if rows:
+                row_groups.append(
+                    write_row_group(out, rows, column_types, compression)
+                )
+
+        footer = json.dumps({
+            'columns': [
+                {'name': header, 'type': COLUMNAR_TYPES[column_type]}
+                for header, column_type in column_types.items()
+            ],
+            'compression': compression,
+            'row_groups': row_groups,
+        }).encode()
+
+        out.write(footer)
+        out.write(struct.pack('<Q', len(footer)))
+        out.write(COLUMNAR_MAGIC)
+
+
+def row_group_may_match(chunk: dict, params: dict) -> bool:
+    '''Check by the statistics if the row group may satisfy "--where".'''
+    stats = chunk['stats']
+    if stats is None:
+        return True
 
-def get_list_where(list_objs: List[dict], params: dict) -> List[dict]:
-    '''Change the list according to the "--where" condition.'''
     if params['operator'] == '=':
-        list_objs = [
-            obj for obj in list_objs
-            if obj[params['column']] == params['value']
-        ]
+        return stats['min'] <= params['value'] <= stats['max']
 
     elif params['operator'] == '<':
-        list_objs = [
-            obj for obj in list_objs
-            if obj[params['column']] < params['value']
-        ]
+        return stats['min'] < params['value']
 
     elif params['operator'] == '>':
+        return stats['max'] > params['value']
+
+    return True
+
+
+class ColumnarFile:
+    '''Memory-mapped reader of the columnar file made by "--convert".'''
+
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if (
+                self.mm[:len(COLUMNAR_MAGIC)] != COLUMNAR_MAGIC
+                or self.mm[-len(COLUMNAR_MAGIC):] != COLUMNAR_MAGIC
+            ):
+                raise ValueError
+
+            tail = len(COLUMNAR_MAGIC) + 8
+            (footer_length,) = struct.unpack('<Q', self.mm[-tail:-tail + 8])
+            footer_offset = len(self.mm) - tail - footer_length
+            metadata = json.loads(self.mm[footer_offset:-tail])
+
+            types_by_name = {name: t for t, name in COLUMNAR_TYPES.items()}
+            self.column_types = {
+                column['name']: types_by_name[column['type']]
+                for column in metadata['columns']
+            }
+            self.compression = metadata['compression']
+            self.row_groups = metadata['row_groups']
+        except (ValueError, KeyError, TypeError, struct.error):
+            self.close()
+            sys.exit('Error: incorrect columnar file')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        '''Unmap and close the file.'''
+        if getattr(self, 'mm', None) is not None:
+            self.mm.close()
+        self.file.close()
+
+    def read_buffer(self, buffer: dict, typecode: str | None = None):
+        '''Return the contents of the buffer, or its values by the typecode.'''
+        start = buffer['offset']
+        end = start + buffer['length']
+
+        with memoryview(self.mm)[start:end] as data:
+            if self.compression == 'zlib':
+                data = zlib.decompress(data)
+
+            if typecode is None:
+                return bytes(data)
+            return unpack_array(typecode, data)
+
+    def read_column(
+        self,
+        row_group: dict,
+        header: str,
+        dictionary: StringDictionary | None = None,
+        codes: dict | None = None
+    ) -> list:
+        '''Return the values of the column in the row group.
+
+        A text column is encoded with "dictionary" and its codes are saved
+        to "codes".
+        '''
+        column_type = self.column_types[header]
+        chunk = row_group['columns'][header]
+        data = self.read_buffer(chunk, COLUMNAR_TYPECODES[column_type])
+
+        if column_type != str:
+            return data
+
+        values = json.loads(self.read_buffer(chunk['dictionary']))
+        column_codes = dictionary and dictionary.translate(values, data)
+
+        if column_codes is None:
+            return [values[code] for code in data]
+
+        if codes is not None:
+            codes[header] = column_codes
+        return dictionary.decode_all(column_codes)
+
+    def iter_batches(
+        self,
+        columns: list | None = None,
+        where_params: dict | None = None,
+        dictionaries: dict | None = None,
+        batch_size: int = BATCH_SIZE
+    ) -> Iterator[Batch]:
+        '''Yield the batches of dictionaries of "batch_size" rows at most.
+
+        Only the given columns are read, and the row groups which cannot
+        satisfy the "--where" condition by their statistics are skipped.
+        A batch never spans two row groups.
+        '''
+        if dictionaries is None:
+            dictionaries = {}
+
+        headers = [
+            header for header in self.column_types
+            if columns is None or header in columns
+        ]
+
+        for header in headers:
+            if self.column_types[header] == str:
+                dictionaries[header] = StringDictionary()
+
+        for row_group in self.row_groups:
+            if where_params and not row_group_may_match(
+                row_group['columns'][where_params['column']],
+                where_params
+            ):
+                continue
+
+            codes = {}
+            values = [
+                self.read_column(
+                    row_group, header, dictionaries.get(header), codes
+                )
+                for header in headers
+            ]
+
+            for start in range(0, row_group['num_rows'], batch_size):
+                stop = start + batch_size
+                rows = zip(*[column[start:stop] for column in values])
+                yield Batch(
+                    [dict(zip(headers, row)) for row in rows],
+                    {
+                        header: column_codes[start:stop]
+                        for header, column_codes in codes.items()
+                    }
+                )
+
+    def read_lines(
+        self,
+        columns: list | None = None,
+        where_params: dict | None = None,
+        dictionaries: dict | None = None
+    ) -> Batch:
+        '''Return the list of dictionaries like "read_lines_of_file".'''
+        list_objs = Batch()
+
+        for batch in self.iter_batches(columns, where_params, dictionaries):
+            list_objs.extend_batch(batch)
+
+        return list_objs
+
+
+def open_table(
+    path: str,
+    delimiter: str | None = None,
+    quotechar: str = '"',
+    encoding: str = 'utf-8',
+    prefetch_depth: int = 0
+) -> dict:
+    '''Return the dictionary describing the csv or columnar file.'''
+    table = {
+        'path': path,
+        'columnar_file': None,
+        'csv_format': None,
+        'prefetch_depth': prefetch_depth
+    }
+
+    if os.path.splitext(path)[1] == '.cols':
+        table['columnar_file'] = ColumnarFile(path)
+        table['column_types'] = table['columnar_file'].column_types
+    else:
+        table['csv_format'] = get_csv_format(
+            path=path,
+            delimiter=delimiter,
+            quotechar=quotechar,
+            encoding=encoding
+        )
+        table['column_types'] = get_column_types(path, table['csv_format'])
+
+    return table
+
+
+def close_table(table: dict) -> None:
+    '''Close the columnar file of the table made by "open_table".'''
+    if table['columnar_file'] is not None:
+        table['columnar_file'].close()
+
+
+def iter_batches_of_table(
+    table: dict,
+    batch_size: int = BATCH_SIZE,
+    dictionaries: dict | None = None,
+    columns: list | None = None,
+    where_params: dict | None = None
+) -> Iterator[List[dict]]:
+    '''Yield the batches of the table made by "open_table".
+
+    For a columnar file only the given columns are read, and "where_params"
+    is used to skip the row groups; the condition itself is not applied.
+    '''
+    if table['columnar_file'] is not None:
+        return table['columnar_file'].iter_batches(
+            columns=columns,
+            where_params=where_params,
+            dictionaries=dictionaries,
+            batch_size=batch_size
+        )
+
+    return iter_batches_of_file(
+        path=table['path'],
+        column_types=table['column_types'],
+        batch_size=batch_size,
+        dictionaries=dictionaries,
+        csv_format=table['csv_format'],
+        prefetch_depth=table['prefetch_depth']
+    )
+
+
+def get_list_where(
+    list_objs: List[dict],
+    params: dict,
+    dictionaries: dict | None = None
+) -> List[dict]:
+    '''Change the list according to the "--where" condition.
+
+    If the list is a Batch with the codes of the column, "=" compares the
+    integer codes from the column dictionary in "dictionaries".
+    '''
+    column = params['column']
+    value = params['value']
+    dictionary = (dictionaries or {}).get(column)
+    codes = getattr(list_objs, 'codes', {}).get(column)
+
+    if (
+        params['operator'] == '='
+        and codes is not None
+        and dictionary is not None
+        and not dictionary.is_dropped
+    ):
+        code = dictionary.codes_by_value.get(value)
         list_objs = [
-            obj for obj in list_objs
-            if obj[params['column']] > params['value']
+            obj for obj, obj_code in zip(list_objs, codes)
+            if obj_code == code
         ]
 
+    elif params['operator'] == '=':
+        list_objs = [obj for obj in list_objs if obj[column] == value]
+
+    elif params['operator'] == '<':
+        list_objs = [obj for obj in list_objs if obj[column] < value]
+
+    elif params['operator'] == '>':
+        list_objs = [obj for obj in list_objs if obj[column] > value]
+
     return list_objs
 
 
-def aggregate_list_objs(list_objs: List[dict], params: dict) -> List[tuple]:
-    '''Aggregate the list according to the "--aggregate" condition.'''
-    if len(list_objs) == 0:
-        return [
-            (params['value'],),
-            ('Error: There are no objects for aggregation',)
-        ]
+def iter_batches_where(
+    batches: Iterable[List[dict]],
+    params: dict,
+    dictionaries: dict | None = None
+) -> Iterator[List[dict]]:
+    '''Yield the batches changed according to the "--where" condition.'''
+    for batch in batches:
+        yield get_list_where(
+            list_objs=batch,
+            params=params,
+            dictionaries=dictionaries
+        )
+
+
+class Accumulator:
+    '''Base class of the aggregation functions.
+
+    The accumulator receives the column values in batches, so a single scan
+    of the data can feed several accumulators, and the partial states
+    collected on separate parts of the data can be merged. A counting
+    accumulator has a result for no values at all.
+    '''
+
+    is_counting = False
+
+    def update(self, values: list) -> None:
+        '''Add the batch of values to the accumulator.'''
+        raise NotImplementedError
+
+    def merge(self, other: 'Accumulator') -> None:
+        '''Add the state of another accumulator of the same kind.'''
+        raise NotImplementedError
+
+    def result(self):
+        '''Return the aggregated value.'''
+        raise NotImplementedError
+
+    def get_size(self) -> int:
+        '''Return the size in bytes of the values kept by the accumulator.'''
+        return 0
+
+
+class CountAccumulator(Accumulator):
+    '''Count the values.'''
+
+    is_counting = True
+
+    def __init__(self):
+        self.count = 0
+
+    def update(self, values: list) -> None:
+        self.count += len(values)
+
+    def merge(self, other: 'CountAccumulator') -> None:
+        self.count += other.count
+
+    def result(self):
+        return self.count
+
+
+class SumAccumulator(Accumulator):
+    '''Sum the values.'''
+
+    def __init__(self):
+        self.total = 0
+
+    def update(self, values: list) -> None:
+        self.total += sum(values)
+
+    def merge(self, other: 'SumAccumulator') -> None:
+        self.total += other.total
 
-    if params['value'] == 'avg':
-        total_amount = 0
+    def result(self):
+        return self.total
 
-        for obj in list_objs:
-            total_amount += obj[params['column']]
 
+class AvgAccumulator(Accumulator):
+    '''Calculate the arithmetic mean of the values.'''
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def update(self, values: list) -> None:
+        self.total += sum(values)
+        self.count += len(values)
+
+    def merge(self, other: 'AvgAccumulator') -> None:
+        self.total += other.total
+        self.count += other.count
+
+    def result(self):
         try:
-            result = total_amount / len(list_objs)
+            return self.total / self.count
         except ZeroDivisionError:
-            result = 0
+            return 0
+
+
+class MinAccumulator(Accumulator):
+    '''Find the smallest value, skipping NaN.'''
+
+    def __init__(self):
+        self.value = None
+
+    def update(self, values: list) -> None:
+        values = [value for value in values if value == value]
+        if values:
+            self.merge_value(min(values))
+
+    def merge(self, other: 'MinAccumulator') -> None:
+        if other.value is not None:
+            self.merge_value(other.value)
+
+    def merge_value(self, value) -> None:
+        if self.value is None or value < self.value:
+            self.value = value
+
+    def result(self):
+        return self.value
+
+
+class MaxAccumulator(MinAccumulator):
+    '''Find the largest value.'''
+
+    def update(self, values: list) -> None:
+        values = [value for value in values if value == value]
+        if values:
+            self.merge_value(max(values))
+
+    def merge_value(self, value) -> None:
+        if self.value is None or value > self.value:
+            self.value = value
+
+
+class VarAccumulator(Accumulator):
+    '''Calculate the sample variance with the Welford algorithm.'''
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: list) -> None:
+        count, mean, m2 = self.count, self.mean, self.m2
+
+        for value in values:
+            count += 1
+            delta = value - mean
+            mean += delta / count
+            m2 += delta * (value - mean)
+
+        self.count, self.mean, self.m2 = count, mean, m2
+
+    def merge(self, other: 'VarAccumulator') -> None:
+        count = self.count + other.count
+        if count == 0:
+            return
 
-    elif params['value'] == 'min':
-        result = float('inf')
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
 
-        for obj in list_objs:
-            result = min(result, obj[params['column']])
+    def result(self):
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
 
-    elif params['value'] == 'max':
-        result = float('-inf')
 
-        for obj in list_objs:
-            result = max(result, obj[params['column']])
+class StddevAccumulator(VarAccumulator):
+    '''Calculate the sample standard deviation.'''
 
-    aggregated_data = [(params['value'],), (result,)]
+    def result(self):
+        return math.sqrt(super().result())
+
+
+class CountDistinctAccumulator(Accumulator):
+    '''Count the unique values, skipping NaN.'''
+
+    is_counting = True
+
+    def __init__(self):
+        self.values = set()
+        self.size = 0
+
+    def update(self, values: list) -> None:
+        new_values = {value for value in values if value == value}
+        new_values -= self.values
+        self.size += sum(map(sys.getsizeof, new_values))
+        self.values |= new_values
+
+    def merge(self, other: 'CountDistinctAccumulator') -> None:
+        self.update(other.values)
+
+    def result(self):
+        return len(self.values)
+
+    def get_size(self) -> int:
+        return sys.getsizeof(self.values) + self.size
+
+
+class PercentileAccumulator(Accumulator):
+    '''Find the exact percentile with linear interpolation.
+
+    The NaN values are skipped, since they have no place in the order.
+    '''
+
+    def __init__(self, rank: int = 50):
+        self.rank = rank
+        self.values = []
+        self.size = 0
+
+    def update(self, values: list) -> None:
+        values = [value for value in values if value == value]
+        self.size += sum(map(sys.getsizeof, values))
+        self.values.extend(values)
+
+    def merge(self, other: 'PercentileAccumulator') -> None:
+        self.size += other.size
+        self.values.extend(other.values)
+
+    def result(self):
+        if not self.values:
+            return None
+
+        position = (len(self.values) - 1) * self.rank / 100
+        index = int(position)
+        fraction = position - index
+        lower = select_kth_value(self.values, index)
+
+        if fraction == 0:
+            return lower
+
+        upper = select_kth_value(self.values, index + 1)
+        return lower + (upper - lower) * fraction
+
+    def get_size(self) -> int:
+        return sys.getsizeof(self.values) + self.size
+
+
+def select_kth_value(values: list, k: int):
+    '''Return the k-th smallest value (from zero) without a full sort.
+
+    The values which are neither less nor greater than the pivot count as
+    equal to it, so every round shrinks the list even for incomparable
+    values like NaN.
+    '''
+    while True:
+        pivot = random.choice(values)
+        lower = [value for value in values if value < pivot]
+
+        if k < len(lower):
+            values = lower
+            continue
+
+        greater = [value for value in values if value > pivot]
+        k -= len(lower)
+        equal_count = len(values) - len(lower) - len(greater)
+
+        if k < equal_count:
+            return pivot
+
+        k -= equal_count
+        values = greater
+
+
+AGGREGATE_FUNCTIONS = {
+    'avg': AvgAccumulator,
+    'min': MinAccumulator,
+    'max': MaxAccumulator,
+    'count': CountAccumulator,
+    'sum': SumAccumulator,
+    'var': VarAccumulator,
+    'stddev': StddevAccumulator,
+    'median': PercentileAccumulator,
+    'count_distinct': CountDistinctAccumulator,
+}
+
+STRING_AGGREGATE_FUNCTIONS = ('count', 'count_distinct')
+
+
+def get_accumulator(name: str) -> Accumulator | None:
+    '''Return a new accumulator for the aggregation function, or None.'''
+    if name in AGGREGATE_FUNCTIONS:
+        return AGGREGATE_FUNCTIONS[name]()
+
+    match = re.fullmatch(r'p(?P<rank>\d{1,3})', name)
+    if match and int(match['rank']) <= 100:
+        return PercentileAccumulator(rank=int(match['rank']))
+
+    return None
+
+
+def get_size_of_accumulators(accumulators: List[Accumulator]) -> int:
+    '''Return the size in bytes of the values kept by the accumulators.'''
+    return sum(accumulator.get_size() for accumulator in accumulators)
+
+
+def aggregate_batches(
+    batches: Iterable[List[dict]],
+    params: dict,
+    memory_limit: int | None = None
+) -> List[tuple]:
+    '''Aggregate the batches according to the "--aggregate" condition.
+
+    The values kept by the accumulators must fit in "memory_limit" bytes.
+    '''
+    names = tuple(params['value'].split(','))
+    accumulators = [get_accumulator(name) for name in names]
+    count = 0
+
+    for batch in batches:
+        values = [obj[params['column']] for obj in batch]
+        count += len(values)
+
+        for accumulator in accumulators:
+            accumulator.update(values)
+
+        if (
+            memory_limit is not None
+            and get_size_of_accumulators(accumulators) > memory_limit
+        ):
+            sys.exit('Error: the result exceeds the "--memory-limit" argument')
+
+    return get_aggregated_data(names, accumulators, count)
+
+
+def get_aggregated_data(
+    names: tuple,
+    accumulators: List[Accumulator],
+    count: int
+) -> List[tuple]:
+    '''Return the table of the accumulator results.
+
+    With no values, only the counting accumulators have results, and the
+    others get the error message.
+    '''
+    error = 'Error: There are no objects for aggregation'
+
+    if count == 0 and not any(
+        accumulator.is_counting for accumulator in accumulators
+    ):
+        return [names, (error,)]
+
+    if count == 0:
+        return [
+            names,
+            tuple(
+                accumulator.result() if accumulator.is_counting else error
+                for accumulator in accumulators
+            )
+        ]
+
+    aggregated_data = [
+        names,
+        tuple(accumulator.result() for accumulator in accumulators)
+    ]
     return aggregated_data
 
 
-def get_list_order_by(list_objs: List[dict], params: dict) -> List[dict]:
-    '''Sort the list by the "--order-by" condition.'''
+def aggregate_list_objs(list_objs: List[dict], params: dict) -> List[tuple]:
+    '''Aggregate the list according to the "--aggregate" condition.'''
+    return aggregate_batches(batches=[list_objs], params=params)
+
+
+QUERY_KEYS = ('where', 'aggregate', 'order_by', 'output')
+
+
+def get_queries_params(column_types: dict, path: str | None) -> list | None:
+    '''Return the list of dictionaries with the parameters of the queries.
+
+    Every line of the file is a JSON object with the optional "where",
+    "aggregate", "order_by" keys in the format of the arguments and
+    "output", the path to the file for the resulting table.
+    '''
+    if path == None:
+        return None
+
+    try:
+        with open(path) as file:
+            specs = [json.loads(line) for line in file if line.strip()]
+    except OSError:
+        sys.exit('Error: file not found in the "--queries" argument')
+    except ValueError:
+        sys.exit('Error: incorrect format of the "--queries" argument')
+
+    queries = []
+
+    for spec in specs:
+        if not isinstance(spec, dict) or any(
+            key not in QUERY_KEYS or not isinstance(value, str)
+            for key, value in spec.items()
+        ):
+            sys.exit('Error: incorrect format of the "--queries" argument')
+
+        query = {
+            'where': get_where_params(column_types, spec.get('where')),
+            'aggregate': get_aggregate_params(
+                column_types,
+                spec.get('aggregate')
+            ),
+            'order_by': get_order_by_params(
+                column_types,
+                spec.get('order_by')
+            ),
+            'output': spec.get('output'),
+        }
+
+        if query['order_by'] and query['aggregate']:
+            sys.exit('Error: the "--order-by" argument is not accepted '
+                     'together with the "--aggregate" argument')
+
+        queries.append(query)
+
+    return queries
+
+
+def run_queries(
+    batches: Iterable[List[dict]],
+    queries: List[dict],
+    dictionaries: dict | None = None,
+    memory_limit: int | None = None
+) -> list:
+    '''Evaluate all queries in a single pass and return their tables.
+
+    Every batch is filtered once per distinct "where" condition and every
+    column is extracted once per condition, then the rows and values are
+    shared by the queries. The kept rows and the values kept by the
+    accumulators of all queries must fit in "memory_limit" bytes.
+    '''
+    states = []
+
+    for query in queries:
+        if query['aggregate']:
+            names = tuple(query['aggregate']['value'].split(','))
+            states.append({
+                'names': names,
+                'accumulators': [get_accumulator(name) for name in names],
+                'count': 0
+            })
+        else:
+            states.append({'list_objs': Batch()})
+
+    size = 0
+
+    for batch in batches:
+        filtered_batches = {}
+        values_of_columns = {}
+
+        for query, state in zip(queries, states):
+            where_params = query['where']
+            where_key = where_params and tuple(where_params.values())
+
+            if where_key not in filtered_batches:
+                filtered_batches[where_key] = batch
+                if where_params:
+                    filtered_batches[where_key] = get_list_where(
+                        list_objs=batch,
+                        params=where_params,
+                        dictionaries=dictionaries
+                    )
+            list_objs = filtered_batches[where_key]
+
+            if query['aggregate']:
+                column = query['aggregate']['column']
+                if (where_key, column) not in values_of_columns:
+                    values_of_columns[where_key, column] = [
+                        obj[column] for obj in list_objs
+                    ]
+                values = values_of_columns[where_key, column]
+
+                state['count'] += len(values)
+                for accumulator in state['accumulators']:
+                    accumulator.update(values)
+                continue
+
+            if memory_limit is not None:
+                size += get_size_of_batch(list_objs)
+            state['list_objs'].extend_batch(list_objs)
+
+        if memory_limit is not None and size + sum(
+            get_size_of_accumulators(state['accumulators'])
+            for state in states if 'accumulators' in state
+        ) > memory_limit:
+            sys.exit('Error: the result exceeds the "--memory-limit" argument')
+
+    results = []
+
+    for query, state in zip(queries, states):
+        if query['aggregate']:
+            results.append(get_aggregated_data(
+                state['names'],
+                state['accumulators'],
+                state['count']
+            ))
+        elif query['order_by']:
+            results.append(get_list_order_by(
+                list_objs=state['list_objs'],
+                params=query['order_by'],
+                dictionaries=dictionaries
+            ))
+        else:
+            results.append(state['list_objs'])
+
+    return results
+
+
+def write_queries_results(queries: List[dict], results: list) -> None:
+    '''Write the table of every query to its output or to the console.'''
+    for number, (query, result) in enumerate(zip(queries, results), 1):
+        headers = 'firstrow' if query['aggregate'] else 'keys'
+        table = tabulate(result, headers=headers, tablefmt='grid')
+
+        if query['output']:
+            with open(query['output'], 'w') as file:
+                file.write(table + '\n')
+        else:
+            print(f'Query {number}:')
+            print(table)
+
+
+def get_list_order_by(
+    list_objs: List[dict],
+    params: dict,
+    dictionaries: dict | None = None
+) -> List[dict]:
+    '''Sort the list by the "--order-by" condition.
+
+    If the list is a Batch with the codes of a text column, its rows are
+    put into a bucket per code and the buckets are joined in the order of
+    the values, which takes linear time. The dictionary is kept only for
+    the columns with few unique values, see StringDictionary.
+    '''
+    column = params['column']
+    dictionary = (dictionaries or {}).get(column)
+    codes = getattr(list_objs, 'codes', {}).get(column)
+
+    if (
+        codes is not None
+        and dictionary is not None
+        and not dictionary.is_dropped
+    ):
+        buckets = [[] for _ in dictionary.values]
+        for obj, code in zip(list_objs, codes):
+            buckets[code].append(obj)
+
+        codes_in_order = dictionary.get_codes_in_order()
+        if params['value'] == 'desc':
+            codes_in_order = reversed(codes_in_order)
+
+        return list(chain.from_iterable(
+            buckets[code] for code in codes_in_order
+        ))
+
     if params['value'] == 'asc':
-        sorted_list = sorted(list_objs, key=itemgetter(params['column']))
+        sorted_list = sorted(list_objs, key=itemgetter(column))
 
     elif params['value'] == 'desc':
-        sorted_list = sorted(
-            list_objs,
-            key=itemgetter(params['column']),
-            reverse=True
-        )
+        sorted_list = sorted(list_objs, key=itemgetter(column), reverse=True)
 
     return sorted_list
 
 
-def main(
-    list_objs: List[dict],
+def get_size_of_batch(batch: List[dict]) -> int:
+    '''Return the size of the batch in bytes.
+
+    Every row is measured, and a string shared by several rows of a plain
+    list is counted once. The strings of the encoded columns of a Batch
+    belong to the code table and are not counted, see StringDictionary.
+    '''
+    size = sys.getsizeof(batch) + sum(map(sys.getsizeof, batch))
+    codes = getattr(batch, 'codes', {})
+    size += sum(map(sys.getsizeof, codes.values()))
+
+    for column, value in batch[0].items() if batch else ():
+        if column in codes:
+            continue
+
+        if isinstance(value, float):
+            size += sys.getsizeof(value) * len(batch)
+            continue
+
+        values = map(itemgetter(column), batch)
+        if isinstance(value, str) and not isinstance(batch, Batch):
+            values = list(values)
+            values = dict(zip(map(id, values), values)).values()
+
+        size += sum(map(sys.getsizeof, values))
+
+    return size
+
+
+JOIN_MEMORY_LIMIT = 256 * 1024 * 1024
+JOIN_PARTITIONS = 16
+
+
+def get_join_params(
+    column_types: dict,
+    join_column_types: dict,
+    path: str,
+    params: str | None
+) -> dict:
+    '''Return the dictionary with the "--join" parameters.
+
+    The columns of the joined file which are also in the main file are
+    renamed to "<file name>_<column>".
+    '''
+    if params == None:
+        sys.exit('Error: the "--join" argument requires the "--on" argument')
+
+    if params not in column_types or params not in join_column_types:
+        sys.exit('Error: invalid column in the "--on" argument')
+
+    prefix = re.sub(r'\W', '_', os.path.splitext(os.path.basename(path))[0])
+    renames = {
+        header: f'{prefix}_{header}' for header in join_column_types
+        if header in column_types and header != params
+    }
+
+    joined_column_types = dict(column_types)
+    for header, column_type in join_column_types.items():
+        header = renames.get(header, header)
+        joined_column_types.setdefault(header, column_type)
+
+    join_params = {
+        'column': params,
+        'renames': renames,
+        'column_types': joined_column_types
+    }
+    return join_params
+
+
+def estimate_row_count(table: dict) -> int:
+    '''Return the number of rows of the table, estimated by a sample.'''
+    if table['columnar_file'] is not None:
+        return sum(
+            row_group['num_rows']
+            for row_group in table['columnar_file'].row_groups
+        )
+
+    size = os.path.getsize(table['path'])
+    with open(table['path'], 'rb') as file:
+        sample = file.read(SNIFF_SAMPLE_SIZE)
+
+    if not sample:
+        return 0
+    return size * max(sample.count(b'\n'), 1) // len(sample)
+
+
+def is_left_build_side(left_table: dict, right_table: dict) -> bool:
+    '''Check if the left table is smaller and should be the build side.'''
+    left = (
+        estimate_row_count(left_table),
+        os.path.getsize(left_table['path'])
+    )
+    right = (
+        estimate_row_count(right_table),
+        os.path.getsize(right_table['path'])
+    )
+    return left <= right
+
+
+def iter_renamed_batches(
+    batches: Iterable[List[dict]],
+    renames: dict
+) -> Iterator[List[dict]]:
+    '''Yield the batches with the columns renamed.'''
+    for batch in batches:
+        if renames:
+            batch = [
+                {renames.get(key, key): value for key, value in row.items()}
+                for row in batch
+            ]
+        yield batch
+
+
+def probe_hash_table(
+    hash_table: dict,
+    batch: List[dict],
+    column: str,
+    build_is_left: bool
+) -> List[dict]:
+    '''Return the rows of the batch joined with the matching built rows.'''
+    joined_batch = []
+
+    for row in batch:
+        matches = hash_table.get(row[column])
+        if not matches:
+            continue
+
+        if build_is_left:
+            joined_batch.extend([{**match, **row} for match in matches])
+        else:
+            joined_batch.extend([{**row, **match} for match in matches])
+
+    return joined_batch
+
+
+def spill_partitions(
+    batches: Iterable[List[dict]],
+    column: str,
+    directory: str,
+    name: str,
+    partitions: int
+) -> List[str]:
+    '''Split the batches by the hash of the column into the files on disk.'''
+    paths = [
+        os.path.join(directory, f'{name}_{i}.pickle')
+        for i in range(partitions)
+    ]
+    files = [open(path, 'wb') for path in paths]
+
+    try:
+        for batch in batches:
+            parts = [[] for _ in range(partitions)]
+            for row in batch:
+                parts[hash(row[column]) % partitions].append(row)
+
+            for file, part in zip(files, parts):
+                if part:
+                    pickle.dump(part, file, pickle.HIGHEST_PROTOCOL)
+    finally:
+        for file in files:
+            file.close()
+
+    return paths
+
+
+def iter_spilled_batches(path: str) -> Iterator[List[dict]]:
+    '''Yield the batches saved to the file by "spill_partitions".'''
+    with open(path, 'rb') as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+def hash_join_batches(
+    build_batches: Iterable[List[dict]],
+    probe_batches: Iterable[List[dict]],
+    column: str,
+    build_is_left: bool,
+    memory_limit: int | None = JOIN_MEMORY_LIMIT,
+    partitions: int = JOIN_PARTITIONS
+) -> Iterator[List[dict]]:
+    '''Join the batches by the equal values of the column.
+
+    The hash table is built from the build side and the probe side is
+    streamed through it. When the build side exceeds "memory_limit" bytes,
+    both sides are partitioned to disk by the hash of the column and the
+    partitions are joined one by one (grace hash join).
+    '''
+    hash_table = {}
+    size = 0
+    build_batches = iter(build_batches)
+
+    for batch in build_batches:
+        size += get_size_of_batch(batch)
+
+        if memory_limit is not None and size > memory_limit:
+            built_batch = [row for rows in hash_table.values() for row in rows]
+            hash_table.clear()
+            yield from grace_hash_join_batches(
+                build_batches=chain([built_batch, batch], build_batches),
+                probe_batches=probe_batches,
+                column=column,
+                build_is_left=build_is_left,
+                partitions=partitions
+            )
+            return
+
+        for row in batch:
+            hash_table.setdefault(row[column], []).append(row)
+
+    for batch in probe_batches:
+        yield probe_hash_table(hash_table, batch, column, build_is_left)
+
+
+def grace_hash_join_batches(
+    build_batches: Iterable[List[dict]],
+    probe_batches: Iterable[List[dict]],
+    column: str,
+    build_is_left: bool,
+    partitions: int = JOIN_PARTITIONS
+) -> Iterator[List[dict]]:
+    '''Join the batches partition by partition through the temporary files.'''
+    with tempfile.TemporaryDirectory() as directory:
+        build_paths = spill_partitions(
+            build_batches, column, directory, 'build', partitions
+        )
+        probe_paths = spill_partitions(
+            probe_batches, column, directory, 'probe', partitions
+        )
+
+        for build_path, probe_path in zip(build_paths, probe_paths):
+            yield from hash_join_batches(
+                build_batches=iter_spilled_batches(build_path),
+                probe_batches=iter_spilled_batches(probe_path),
+                column=column,
+                build_is_left=build_is_left,
+                memory_limit=None
+            )
+
+
+def get_joined_batches(
+    table: dict,
+    join_table: dict,
+    join_params: dict,
+    where_params: dict | None,
+    batch_size: int = BATCH_SIZE,
+    dictionaries: dict | None = None,
+    memory_limit: int | None = JOIN_MEMORY_LIMIT
+) -> Iterator[List[dict]]:
+    '''Return the batches of the tables joined by the "--on" column.
+
+    The "--where" condition is applied to the side owning its column, or
+    to both sides for the join column. The smaller table is the build side.
+    '''
+    if dictionaries is None:
+        dictionaries = {}
+
+    column = join_params['column']
+    renames = join_params['renames']
+    original_names = {renamed: header for header, renamed in renames.items()}
+    left_where_params = right_where_params = None
+
+    if where_params and where_params['column'] in table['column_types']:
+        left_where_params = where_params
+
+    if where_params and (
+        where_params['column'] == column
+        or where_params['column'] not in table['column_types']
+    ):
+        right_where_params = dict(
+            where_params,
+            column=original_names.get(
+                where_params['column'],
+                where_params['column']
+            )
+        )
+
+    sides = []
+
+    for side_table, side_where_params in [
+        (table, left_where_params),
+        (join_table, right_where_params)
+    ]:
+        side_dictionaries = {}
+        side_batches = iter_batches_of_table(
+            table=side_table,
+            batch_size=batch_size,
+            dictionaries=side_dictionaries,
+            where_params=side_where_params
+        )
+
+        if side_where_params:
+            side_batches = iter_batches_where(
+                batches=side_batches,
+                params=side_where_params,
+                dictionaries=side_dictionaries
+            )
+
+        sides.append((side_batches, side_dictionaries))
+
+    left_batches, left_dictionaries = sides[0]
+    right_batches, right_dictionaries = sides[1]
+    right_batches = iter_renamed_batches(right_batches, renames)
+
+    for header, dictionary in right_dictionaries.items():
+        dictionaries[renames.get(header, header)] = dictionary
+    dictionaries.update(left_dictionaries)
+
+    build_is_left = is_left_build_side(table, join_table)
+
+    return hash_join_batches(
+        build_batches=left_batches if build_is_left else right_batches,
+        probe_batches=right_batches if build_is_left else left_batches,
+        column=column,
+        build_is_left=build_is_left,
+        memory_limit=memory_limit
+    )
+
+
+def main_of_batches(
+    batches: Iterable[List[dict]],
     where_params: dict | None,
     aggregate_params: dict | None,
-    order_by_params: dict | None
+    order_by_params: dict | None,
+    dictionaries: dict | None = None,
+    memory_limit: int | None = None
 ) -> List[dict]:
-    '''Edit the list and output the resulting table.'''
+    '''Pass the batches through the conditions and output the table.
+
+    The rows kept for the table, or the values kept by the accumulators,
+    must fit in "memory_limit" bytes.
+    '''
     if order_by_params and aggregate_params:
         sys.exit('Error: the "--order-by" argument is not accepted together '
                  'with the "--aggregate" argument')
 
     if where_params:
-        list_objs = get_list_where(list_objs=list_objs, params=where_params)
+        batches = iter_batches_where(
+            batches=batches,
+            params=where_params,
+            dictionaries=dictionaries
+        )
 
     if aggregate_params:
-        aggregated_data = aggregate_list_objs(
-            list_objs=list_objs,
-            params=aggregate_params
+        aggregated_data = aggregate_batches(
+            batches=batches,
+            params=aggregate_params,
+            memory_limit=memory_limit
         )
         print(tabulate(aggregated_data, headers='firstrow', tablefmt='grid'))
         sys.exit(0)
 
+    list_objs = Batch()
+    size = 0
+
+    for batch in batches:
+        if memory_limit is not None:
+            size += get_size_of_batch(batch)
+            if size > memory_limit:
+                sys.exit(
+                    'Error: the result exceeds the "--memory-limit" argument'
+                )
+
+        list_objs.extend_batch(batch)
+
     if order_by_params:
         list_objs = get_list_order_by(
             list_objs=list_objs,
-            params=order_by_params
+            params=order_by_params,
+            dictionaries=dictionaries
         )
 
     print(tabulate(list_objs, headers='keys', tablefmt='grid'))
     return list_objs
 
 
-if __name__ == '__main__':
-    args = get_args()
+def main(
+    list_objs: List[dict],
+    where_params: dict | None,
+    aggregate_params: dict | None,
+    order_by_params: dict | None,
+    dictionaries: dict | None = None
+) -> List[dict]:
+    '''Edit the list and output the resulting table.'''
+    return main_of_batches(
+        batches=[list_objs],
+        where_params=where_params,
+        aggregate_params=aggregate_params,
+        order_by_params=order_by_params,
+        dictionaries=dictionaries
+    )
 
-    path_to_csv_file = get_path_to_csv_file(path=args.file)
-    column_types = get_column_types(path_to_csv_file)
 
-    where_params = get_where_params(
-        column_types=column_types,
-        params=args.where
-    )
-    aggregate_params = get_aggregate_params(
-        column_types=column_types,
-        params=args.aggregate
-    )
-    order_by_params = get_order_by_params(
-        column_types=column_types,
-        params=args.order_by
-    )
+WHERE_OPERATORS = {'=': eq, '<': lt, '>': gt}
+ROW_INDEX_STEP = 4096
+PAGER_TIMEOUT = 200
+PAGER_HELP = ('q quit  arrows/PgUp/PgDn move  Left/Right column  '
+              'a/d sort  f filter  r reset')
 
-    list_objs_of_file = read_lines_of_file(
-        path=path_to_csv_file,
-        column_types=column_types
-    )
 
-    main(
-        list_objs=list_objs_of_file,
-        where_params=where_params,
-        aggregate_params=aggregate_params,
-        order_by_params=order_by_params
-    )
+class RowIndex:
+    '''Byte offsets of the rows of the csv file, found by a background thread.
+
+    The lines of the file are decoded and parsed by "csv.reader" as the row
+    reader does, so a stray quote inside a field does not join the rows.
+    The offset of a row is the byte count of the lines read before it.
+    '''
+
+    def __init__(self, path: str, csv_format: dict | None = None):
+        if csv_format is None:
+            csv_format = CSV_FORMAT
+
+        self.path = path
+        self.csv_format = csv_format
+        self.offsets = array('q')
+        self.end = 0
+        self.is_complete = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.build, daemon=True)
+        self.thread.start()
+
+    def build(self) -> None:
+        '''Find the offsets of the rows after the headers.'''
+        offsets = array('q')
+        end = 0
+
+        def read_lines(file) -> Iterator[str]:
+            '''Yield the decoded lines of the file, counting their bytes.'''
+            nonlocal end
+            decode = codecs.getincrementaldecoder(
+                self.csv_format['encoding']
+            )().decode
+
+            for line in file:
+                end += len(line)
+                yield decode(line)
+
+        try:
+            with open(self.path, 'rb') as file:
+                rows = csv.reader(
+                    read_lines(file),
+                    delimiter=self.csv_format['delimiter'],
+                    quotechar=self.csv_format['quotechar']
+                )
+                next(rows, None)
+                offset = end
+
+                for row in rows:
+                    if row:
+                        offsets.append(offset)
+                    offset = end
+
+                    if len(offsets) == ROW_INDEX_STEP:
+                        with self.condition:
+                            self.offsets.extend(offsets)
+                            self.condition.notify_all()
+                        offsets = array('q')
+        finally:
+            with self.condition:
+                self.offsets.extend(offsets)
+                self.end = end
+                self.is_complete = True
+                self.condition.notify_all()
+
+    def wait(self, count: int | None = None) -> int:
+        '''Wait for "count" rows, or for all rows, and return the row count.'''
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.is_complete
+                or (count is not None and len(self.offsets) >= count)
+            )
+            return len(self.offsets)
+
+    def get_range(self, start: int, stop: int) -> tuple:
+        '''Return the byte range of the rows from "start" to "stop".
+
+        The range of the rows past the last one found is empty.
+        '''
+        self.wait(stop + 1)
+
+        with self.condition:
+            if start >= len(self.offsets):
+                return self.end, self.end
+            if stop < len(self.offsets):
+                return self.offsets[start], self.offsets[stop]
+            return self.offsets[start], self.end
+
+
+class PagerSource:
+    '''Rows of the csv file for the pager, read page by page.
+
+    Pages are read from the file through the row index. For "--where" and
+    "--order-by" the needed column is read once, and the sort permutations
+    are cached, so switching the order does not read the file again.
+    '''
+
+    def __init__(
+        self,
+        path: str,
+        column_types: dict,
+        csv_format: dict | None = None,
+        prefetch_depth: int = 0
+    ):
+        if csv_format is None:
+            csv_format = CSV_FORMAT
+
+        self.path = path
+        self.column_types = column_types
+        self.headers = list(column_types)
+        self.csv_format = csv_format
+        self.prefetch_depth = prefetch_depth
+        self.row_index = RowIndex(path, csv_format)
+        self.columns = {}
+        self.permutations = {}
+        self.where_params = None
+        self.order_by_params = None
+        self.view = None
+
+    def get_column(self, column: str) -> list:
+        '''Return the typed values of the column, reading it once.'''
+        if column not in self.columns:
+            i = self.headers.index(column)
+            column_type = self.column_types[column]
+
+            with open_csv_file(
+                self.path, self.csv_format, self.prefetch_depth
+            ) as file:
+                reader = iter_rows_of_file(file, self.csv_format)
+                next(reader)
+                self.columns[column] = [
+                    column_type(row[i]) for row in reader if row
+                ]
+
+        return self.columns[column]
+
+    def get_permutation(self, params: dict) -> list:
+        '''Return the row numbers sorted by the "--order-by" condition.'''
+        key = (params['column'], params['value'])
+
+        if key not in self.permutations:
+            values = self.get_column(params['column'])
+            self.permutations[key] = sorted(
+                range(len(values)),
+                key=values.__getitem__,
+                reverse=params['value'] == 'desc'
+            )
+
+        return self.permutations[key]
+
+    def set_view(
+        self,
+        where_params: dict | None = None,
+        order_by_params: dict | None = None
+    ) -> None:
+        '''Filter and sort the rows by the conditions.'''
+        self.where_params = where_params
+        self.order_by_params = order_by_params
+
+        if where_params is None and order_by_params is None:
+            self.view = None
+            return
+
+        if order_by_params:
+            numbers = self.get_permutation(order_by_params)
+        else:
+            numbers = range(len(self.get_column(where_params['column'])))
+
+        if where_params:
+            values = self.get_column(where_params['column'])
+            compare = WHERE_OPERATORS[where_params['operator']]
+            value = where_params['value']
+            numbers = [i for i in numbers if compare(values[i], value)]
+
+        self.view = list(numbers)
+
+    def get_row_count(self) -> int:
+        '''Return the number of rows found so far.'''
+        if self.view is not None:
+            return len(self.view)
+        return len(self.row_index.offsets)
+
+    def is_complete(self) -> bool:
+        '''Check if all rows of the file are found.'''
+        return self.view is not None or self.row_index.is_complete
+
+    def read_rows(self, start: int, stop: int) -> List[dict]:
+        '''Read the rows of the file from "start" to "stop".'''
+        begin, end = self.row_index.get_range(start, stop)
+
+        with open(self.path, 'rb') as file:
+            file.seek(begin)
+            data = file.read(end - begin)
+
+        text = io.TextIOWrapper(
+            io.BytesIO(data),
+            encoding=self.csv_format['encoding']
+        )
+        rows = [row for row in iter_rows_of_file(text, self.csv_format) if row]
+        return convert_rows(self.headers, rows, self.column_types)
+
+    def get_rows(self, start: int, count: int) -> List[dict]:
+        '''Return the rows of the page, in the order of the view.'''
+        if self.view is None:
+            stop = min(start + count, self.row_index.wait(start + count))
+            if start >= stop:
+                return []
+            return self.read_rows(start, stop)
+
+        numbers = self.view[start:start + count]
+        list_objs = []
+        i = 0
+
+        while i < len(numbers):
+            j = i + 1
+            while j < len(numbers) and numbers[j] == numbers[j - 1] + 1:
+                j += 1
+
+            list_objs += self.read_rows(numbers[i], numbers[j - 1] + 1)
+            i = j
+
+        return list_objs
+
+
+def render_page(list_objs: List[dict], headers: list) -> tuple:
+    '''Return the lines of the page table and the spans of its columns.'''
+    lines = tabulate(
+        [[obj[header] for header in headers] for obj in list_objs],
+        headers=headers,
+        tablefmt='simple'
+    ).splitlines()
+
+    spans = [
+        match.span()
+        for match in re.finditer(r'-+', lines[1] if len(lines) > 1 else '')
+    ]
+    return lines, spans
+
+
+def prompt(screen, text: str) -> str:
+    '''Ask for a line of text in the bottom row of the screen.'''
+    import curses
+
+    height, width = screen.getmaxyx()
+    screen.move(height - 1, 0)
+    screen.clrtoeol()
+    screen.addnstr(height - 1, 0, text, width - 1)
+    curses.echo()
+    curses.curs_set(1)
+    screen.timeout(-1)
+
+    try:
+        answer = screen.getstr(height - 1, min(len(text), width - 1))
+    finally:
+        curses.noecho()
+        curses.curs_set(0)
+        screen.timeout(PAGER_TIMEOUT)
+
+    return answer.decode(errors='replace').strip()
+
+
+def draw_page(
+    screen,
+    lines: List[str],
+    spans: List[tuple],
+    current_column: int
+) -> None:
+    '''Draw the page table, scrolled to show the current column.'''
+    import curses
+
+    height, width = screen.getmaxyx()
+    left = 0
+    if current_column < len(spans):
+        column_start, column_end = spans[current_column]
+        if column_end > width:
+            left = column_end - width + 1
+        left = min(left, column_start)
+
+    screen.erase()
+
+    for y, line in enumerate(lines[:height - 1]):
+        screen.addnstr(y, 0, line[left:], width - 1)
+
+    if current_column < len(spans):
+        column_start = spans[current_column][0] - left
+        column_end = min(spans[current_column][1] - left, width - 1)
+        if column_end > column_start:
+            screen.chgat(
+                0,
+                column_start,
+                column_end - column_start,
+                curses.A_REVERSE
+            )
+
+
+def run_pager(screen, source: PagerSource) -> None:
+    '''Show the rows of the source page by page until "q" is pressed.
+
+    The page is read and rendered only after a key press. While the row
+    index is being built, the timeout of "getch" redraws the status line
+    alone, and the page only if it was short and more rows were found.
+    '''
+    import curses
+
+    curses.curs_set(0)
+    screen.timeout(PAGER_TIMEOUT)
+    top = 0
+    current_column = 0
+    message = PAGER_HELP
+    list_objs = None
+
+    while True:
+        height, width = screen.getmaxyx()
+        page_size = max(height - 3, 1)
+
+        if list_objs is None:
+            list_objs = source.get_rows(top, page_size)
+            lines, spans = render_page(list_objs, source.headers)
+            draw_page(screen, lines, spans, current_column)
+
+        count = source.get_row_count()
+        total = f'{count}' if source.is_complete() else f'{count}+'
+        status = f'rows {top + 1}-{top + len(list_objs)} of {total}  {message}'
+        screen.move(height - 1, 0)
+        screen.clrtoeol()
+        screen.addnstr(height - 1, 0, status, width - 1, curses.A_BOLD)
+        screen.refresh()
+
+        key = screen.getch()
+        if key == -1:
+            if (
+                len(list_objs) < page_size
+                and source.get_row_count() > top + len(list_objs)
+            ):
+                list_objs = None
+            continue
+
+        list_objs = None
+        message = PAGER_HELP
+
+        if key == ord('q'):
+            return
+        elif key in (curses.KEY_DOWN, ord('j')):
+            top += 1
+        elif key in (curses.KEY_UP, ord('k')):
+            top -= 1
+        elif key in (curses.KEY_NPAGE, ord(' ')):
+            top += page_size
+        elif key == curses.KEY_PPAGE:
+            top -= page_size
+        elif key in (curses.KEY_HOME, ord('g')):
+            top = 0
+        elif key in (curses.KEY_END, ord('G')):
+            top = source.row_index.wait() if source.view is None else count
+            top -= page_size
+        elif key == curses.KEY_LEFT:
+            current_column = max(current_column - 1, 0)
+        elif key == curses.KEY_RIGHT:
+            current_column = min(
+                current_column + 1,
+                len(source.headers) - 1
+            )
+        elif key in (ord('a'), ord('d')):
+            order_by_params = {
+                'column': source.headers[current_column],
+                'operator': '=',
+                'value': 'asc' if key == ord('a') else 'desc'
+            }
+            source.set_view(source.where_params, order_by_params)
+            top = 0
+        elif key == ord('f'):
+            params = prompt(screen, 'where (empty to clear): ')
+            try:
+                where_params = get_where_params(
+                    source.column_types,
+                    params or None
+                )
+            except SystemExit as error:
+                message = str(error.code)
+            else:
+                source.set_view(where_params, source.order_by_params)
+                top = 0
+        elif key == ord('r'):
+            source.set_view()
+            top = 0
+
+        top = max(min(top, source.get_row_count() - 1), 0)
+
+
+def show_pager(source: PagerSource) -> None:
+    '''Run the pager in the terminal.'''
+    import curses
+
+    curses.wrapper(run_pager, source)
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    if args.batch_size < 1:
+        sys.exit('Error: invalid value in the "--batch-size" argument')
+
+    memory_limit = None
+    if args.memory_limit is not None:
+        if args.memory_limit < 0:
+            sys.exit('Error: invalid value in the "--memory-limit" argument')
+        memory_limit = args.memory_limit * 1024 * 1024
+
+    if args.join_memory_limit < 0:
+        sys.exit('Error: invalid value in the "--join-memory-limit" argument')
+    join_memory_limit = args.join_memory_limit * 1024 * 1024
+
+    if args.on and not args.join:
+        sys.exit('Error: the "--on" argument requires the "--join" argument')
+
+    if args.prefetch_depth < 0:
+        sys.exit('Error: invalid value in the "--prefetch-depth" argument')
+
+    with ExitStack() as stack:
+        path_to_csv_file = get_path_to_csv_file(path=args.file)
+        table = open_table(
+            path=path_to_csv_file,
+            delimiter=args.delimiter,
+            quotechar=args.quotechar,
+            encoding=args.encoding,
+            prefetch_depth=args.prefetch_depth
+        )
+        stack.callback(close_table, table)
+        column_types = table['column_types']
+
+        if args.convert:
+            if table['columnar_file'] is not None:
+                sys.exit('Error: the "--convert" argument requires a csv file')
+
+            write_columnar_file(
+                path=path_to_csv_file,
+                out_path=args.convert,
+                column_types=column_types,
+                compression=args.compression,
+                csv_format=table['csv_format']
+            )
+            sys.exit(0)
+
+        if args.pager:
+            if table['columnar_file'] is not None:
+                sys.exit('Error: the "--pager" argument requires a csv file')
+
+            if args.aggregate or args.join or args.queries:
+                sys.exit('Error: the "--pager" argument is not accepted '
+                         'together with the "--aggregate", "--join" and '
+                         '"--queries" arguments')
+
+            source = PagerSource(
+                path=path_to_csv_file,
+                column_types=column_types,
+                csv_format=table['csv_format'],
+                prefetch_depth=args.prefetch_depth
+            )
+            source.set_view(
+                where_params=get_where_params(column_types, args.where),
+                order_by_params=get_order_by_params(
+                    column_types,
+                    args.order_by
+                )
+            )
+            show_pager(source)
+            sys.exit(0)
+
+        join_params = None
+        if args.join:
+            join_table = open_table(
+                path=get_path_to_csv_file(path=args.join),
+                delimiter=args.delimiter,
+                quotechar=args.quotechar,
+                encoding=args.encoding,
+                prefetch_depth=args.prefetch_depth
+            )
+            stack.callback(close_table, join_table)
+            join_params = get_join_params(
+                column_types=column_types,
+                join_column_types=join_table['column_types'],
+                path=join_table['path'],
+                params=args.on
+            )
+            column_types = join_params['column_types']
+
+        if args.queries and (args.where or args.aggregate or args.order_by):
+            sys.exit('Error: the "--queries" argument is not accepted '
+                     'together with the "--where", "--aggregate" and '
+                     '"--order-by" arguments')
+
+        where_params = get_where_params(
+            column_types=column_types,
+            params=args.where
+        )
+        aggregate_params = get_aggregate_params(
+            column_types=column_types,
+            params=args.aggregate
+        )
+        order_by_params = get_order_by_params(
+            column_types=column_types,
+            params=args.order_by
+        )
+
+        queries = get_queries_params(
+            column_types=column_types,
+            path=args.queries
+        )
+        dictionaries = {}
+
+        if join_params:
+            batches = get_joined_batches(
+                table=table,
+                join_table=join_table,
+                join_params=join_params,
+                where_params=where_params,
+                batch_size=args.batch_size,
+                dictionaries=dictionaries,
+                memory_limit=join_memory_limit
+            )
+            where_params = None
+        else:
+            columns = None
+            if aggregate_params:
+                columns = [aggregate_params['column']]
+                if where_params:
+                    columns.append(where_params['column'])
+
+            elif queries and all(query['aggregate'] for query in queries):
+                columns = [query['aggregate']['column'] for query in queries]
+                columns += [
+                    query['where']['column'] for query in queries
+                    if query['where']
+                ]
+
+            batches = iter_batches_of_table(
+                table=table,
+                batch_size=args.batch_size,
+                dictionaries=dictionaries,
+                columns=columns,
+                where_params=where_params
+            )
+
+        if queries is not None:
+            results = run_queries(
+                batches=batches,
+                queries=queries,
+                dictionaries=dictionaries,
+                memory_limit=memory_limit
+            )
+            write_queries_results(queries=queries, results=results)
+            sys.exit(0)
+
+        main_of_batches(
+            batches=batches,
+            where_params=where_params,
+            aggregate_params=aggregate_params,
+            order_by_params=order_by_params,
+            dictionaries=dictionaries,
+            memory_limit=memory_limit
+        )